@@ -0,0 +1,12 @@
+# Control front-ends for spark.py, see CONTROL_PLUGINS there.
+# Keep this module free of heavy imports: it is loaded for every front-end.
+
+
+class ControlFrontEnd:
+    """Base for front-ends that let the host pause, resume and stop SPARK"""
+
+    async def start(self, app):
+        """Begin accepting commands; front-ends on their own thread use app.call_soon"""
+
+    async def stop(self):
+        """Stop accepting commands and restore whatever was changed (terminal modes, hooks)"""
@@ -0,0 +1,41 @@
+from controls import ControlFrontEnd
+from controls.text_input import TextInputControl
+
+# Try to import keyboard library for better key detection
+try:
+    import keyboard
+    KEYBOARD_AVAILABLE = True
+except ImportError:
+    KEYBOARD_AVAILABLE = False
+
+
+class KeyboardHookControl(ControlFrontEnd):
+    """Global SPACEBAR/ESC hotkeys via the keyboard library, typed commands if it is missing"""
+
+    def __init__(self):
+        self._hooks = []
+        self._fallback = None
+
+    async def start(self, app):
+        if not KEYBOARD_AVAILABLE:
+            print("⚠️  Keyboard library not found. Install with: pip install keyboard")
+            print("🔧 Falling back to text-based controls")
+            self._fallback = TextInputControl()
+            await self._fallback.start(app)
+            return
+
+        print("🎮 SPACEBAR CONTROL ACTIVE")
+        print("Press SPACEBAR to toggle pause/resume")
+        print("Press ESC to exit")
+        # The hooks fire on the keyboard library's own thread
+        self._hooks = [
+            keyboard.on_press_key('space', lambda _: app.call_soon(app.toggle_pause, "keyboard")),
+            keyboard.on_press_key('esc', lambda _: app.call_soon(app.stop, "keyboard")),
+        ]
+
+    async def stop(self):
+        for hook in self._hooks:
+            keyboard.unhook(hook)
+        self._hooks = []
+        if self._fallback:
+            await self._fallback.stop()
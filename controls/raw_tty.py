@@ -0,0 +1,59 @@
+import select
+import sys
+import termios
+import threading
+import tty
+from controls import ControlFrontEnd
+
+
+class RawTtyControl(ControlFrontEnd):
+    """Spacebar toggles pause/resume, Ctrl+C exits; reads the terminal in raw mode (POSIX only)"""
+
+    def __init__(self):
+        self._app = None
+        self._original_settings = None
+        self._running = False
+        self._thread = None
+
+    async def start(self, app):
+        self._app = app
+        print("Press SPACEBAR to pause/resume listening, Ctrl+C to exit")
+        if not sys.stdin.isatty():
+            print("⚠️  stdin is not a terminal, spacebar control disabled")
+            return
+        self._original_settings = termios.tcgetattr(sys.stdin)
+        tty.setraw(sys.stdin.fileno())
+        self._running = True
+        self._thread = threading.Thread(target=self._listen_for_keys, daemon=True)
+        self._thread.start()
+
+    def _listen_for_keys(self):
+        try:
+            while self._running:
+                # Poll so stop() can end the thread and restore the terminal
+                ready, _, _ = select.select([sys.stdin], [], [], 0.2)
+                if not ready:
+                    continue
+                char = sys.stdin.read(1)
+                if char == " ":
+                    # Apply the change on the session's event loop
+                    self._app.call_soon(self._app.toggle_pause, "keyboard")
+                    print("Press SPACEBAR to toggle pause/resume, Ctrl+C to exit")
+                elif char == "\x03":  # Ctrl+C
+                    self._app.call_soon(self._app.stop, "keyboard")
+                    break
+        except Exception as e:
+            print(f"Keyboard error: {e}")
+        finally:
+            self._restore_terminal()
+
+    def _restore_terminal(self):
+        if self._original_settings:
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self._original_settings)
+            self._original_settings = None
+
+    async def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        self._restore_terminal()
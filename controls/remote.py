@@ -0,0 +1,40 @@
+import os
+import tempfile
+from controls import ControlFrontEnd
+from remote_control import RemoteControl
+from session_store import safe_name
+
+# Participant identities allowed to control SPARK over the room, e.g.
+# SPARK_OPERATORS=stage-manager,producer. Nobody until it is set; the local
+# socket is only reachable by the worker's own user.
+REMOTE_OPERATORS = frozenset(
+    name.strip() for name in os.environ.get("SPARK_OPERATORS", "").split(",") if name.strip()
+)
+CONTROL_SOCKET_DIR = tempfile.gettempdir()
+
+
+class RemoteFrontEnd(ControlFrontEnd):
+    """Operator commands over room data messages and a local Unix socket"""
+
+    def __init__(self):
+        self.control = None
+
+    async def start(self, app):
+        self.control = RemoteControl(
+            {
+                "pause": lambda _: app.set_paused(True, "remote"),
+                "resume": lambda _: app.set_paused(False, "remote"),
+                "status": lambda _: app.status(),
+                "quit": lambda _: app.stop("remote"),
+                "announce": app.announce,
+            },
+            room=app.room,
+            socket_path=os.path.join(CONTROL_SOCKET_DIR, f"spark-{safe_name(app.room_name)}.sock"),
+            operators=REMOTE_OPERATORS,
+        )
+        app.state_listeners.append(self.control.publish_state)
+        await self.control.start()
+
+    async def stop(self):
+        if self.control:
+            await self.control.stop()
@@ -0,0 +1,53 @@
+import threading
+from controls import ControlFrontEnd
+
+
+class TextInputControl(ControlFrontEnd):
+    """Typed commands (p/r/s/q + Enter), works on any platform and terminal"""
+
+    def __init__(self):
+        self._app = None
+
+    async def start(self, app):
+        self._app = app
+        # input() cannot be interrupted, so the thread is a daemon and just dies with the worker
+        threading.Thread(target=self._text_input_loop, daemon=True).start()
+
+    def _text_input_loop(self):
+        app = self._app
+        print("\n" + "="*50)
+        print("🎤 VOICE AGENT CONTROLS")
+        print("="*50)
+        print("Commands (press Enter after typing):")
+        print("  'p' or 'pause'  - Pause listening")
+        print("  'r' or 'resume' - Resume listening")
+        print("  'q' or 'quit'   - Exit")
+        print("  's' or 'status' - Show status")
+        print("="*50 + "\n")
+
+        try:
+            while app.running:
+                try:
+                    command = input("📝 Command: ").strip().lower()
+                except (EOFError, KeyboardInterrupt):
+                    app.call_soon(app.stop, "text")
+                    break
+
+                if command in ['p', 'pause']:
+                    if app.paused:
+                        print("⚠️  Already paused")
+                    app.call_soon(app.set_paused, True, "text")
+                elif command in ['r', 'resume']:
+                    if not app.paused:
+                        print("⚠️  Already listening")
+                    app.call_soon(app.set_paused, False, "text")
+                elif command in ['q', 'quit', 'exit']:
+                    app.call_soon(app.stop, "text")
+                    break
+                elif command in ['s', 'status', '']:
+                    status = "PAUSED" if app.paused else "LISTENING"
+                    print(f"📊 Status: {status}")
+                else:
+                    print(f"❓ Unknown: '{command}' | Try: p/r/q/s")
+        except Exception as e:
+            print(f"Input error: {e}")
@@ -0,0 +1,463 @@
+import asyncio
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Runs CPU-heavy audio stages (echo cancellation, resampling, VAD, ...) in worker
+# processes so they cannot stall the asyncio loop that drives the AgentSession.
+#
+# Each stream owns three single-producer/single-consumer rings in shared memory:
+# microphone audio in, processed audio out, and the agent's reference audio.
+# Samples never go through pickle; the pipe to the worker only carries tiny
+# control tuples ("open", "data", "clear_reference", "ready", ...). A stream is
+# pinned to one worker, so its audio is always processed in order, and a full
+# ring pushes back on whoever is writing to it.
+#
+# A pool belongs to the process that started it. spark.py runs every room as
+# its own LiveKit job process, so each room starts its own pool of
+# DSP_WORKERS processes; the multi-room benchmark below shows what sharing one
+# pool between many streams in a single process would look like.
+
+
+def _as_int16(samples):
+    """Samples for the int16 rings; float audio in [-1, 1] is scaled, not truncated to zero"""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples
+    if np.issubdtype(samples.dtype, np.floating):
+        return np.round(np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    return samples.astype(np.int16)
+
+
+def _build_stages(stage_specs):
+    return [factory(**kwargs) for factory, kwargs in stage_specs]
+
+
+class SharedRing:
+    """Lock-free int16 ring buffer in shared memory (one writer, one reader)"""
+
+    HEADER_BYTES = 64
+
+    def __init__(self, capacity=None, name=None):
+        if name is None:
+            size = self.HEADER_BYTES + capacity * 2
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+            capacity = (self._shm.size - self.HEADER_BYTES) // 2
+        self.capacity = capacity
+        # [0] = total samples written, [1] = total samples read
+        self._positions = np.ndarray((2,), dtype=np.int64, buffer=self._shm.buf)
+        self._data = np.ndarray((capacity,), dtype=np.int16, buffer=self._shm.buf,
+                                offset=self.HEADER_BYTES)
+        if self._owner:
+            self._positions[:] = 0
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def readable(self):
+        return int(self._positions[0] - self._positions[1])
+
+    @property
+    def writable(self):
+        return self.capacity - self.readable
+
+    def write(self, samples):
+        """Append all samples, or nothing if they do not fit"""
+        count = len(samples)
+        if count > self.writable:
+            return False
+        start = int(self._positions[0]) % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:count - first] = samples[first:]
+        # Publish the data only after it has been copied in
+        self._positions[0] += count
+        return True
+
+    def read(self, max_samples=None):
+        """Remove and return up to max_samples samples"""
+        count = self.readable if max_samples is None else min(self.readable, max_samples)
+        start = int(self._positions[1]) % self.capacity
+        first = min(count, self.capacity - start)
+        out = np.concatenate((self._data[start:start + first], self._data[:count - first]))
+        self._positions[1] += count
+        return out
+
+    def close(self):
+        # Drop the numpy views first, shared memory refuses to close while exported
+        self._positions = None
+        self._data = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class _WorkerStream:
+    def __init__(self, stage_specs, in_name, out_name, ref_name):
+        self.stages = _build_stages(stage_specs)
+        self.input = SharedRing(name=in_name)
+        self.output = SharedRing(name=out_name)
+        self.reference = SharedRing(name=ref_name)
+        self.pending = np.zeros(0, dtype=np.int16)
+
+    def clear_reference(self):
+        # Everything in the ring was queued before the clear was requested
+        self.reference.read()
+        for stage in self.stages:
+            if hasattr(stage, "clear_reference"):
+                stage.clear_reference()
+
+    def run(self):
+        """Process everything available, returns True if output is still backed up"""
+        if len(self.pending) and not self.output.write(self.pending):
+            return True
+        self.pending = np.zeros(0, dtype=np.int16)
+
+        reference = self.reference.read()
+        if len(reference):
+            for stage in self.stages:
+                if hasattr(stage, "push_reference"):
+                    stage.push_reference(reference)
+
+        samples = self.input.read()
+        if not len(samples):
+            return False
+        for stage in self.stages:
+            samples = stage.process(samples)
+        samples = np.asarray(samples, dtype=np.int16)
+        if not self.output.write(samples):
+            self.pending = samples
+            return True
+        return False
+
+    def close(self):
+        for ring in (self.input, self.output, self.reference):
+            ring.close()
+
+
+def _worker_main(conn, stage_specs):
+    streams = {}
+    backed_up = set()
+    while True:
+        # Retry streams whose output ring was full every few milliseconds
+        if not conn.poll(0.005 if backed_up else None):
+            messages = []
+        else:
+            messages = []
+            while conn.poll():
+                messages.append(conn.recv())
+
+        ready = set(backed_up)
+        for message in messages:
+            kind, stream_id = message[0], message[1]
+            if kind == "open":
+                streams[stream_id] = _WorkerStream(stage_specs, *message[2:])
+            elif kind == "close":
+                stream = streams.pop(stream_id, None)
+                backed_up.discard(stream_id)
+                ready.discard(stream_id)
+                if stream:
+                    stream.close()
+            elif kind == "data":
+                ready.add(stream_id)
+            elif kind == "clear_reference":
+                if stream_id in streams:
+                    streams[stream_id].clear_reference()
+            elif kind == "stop":
+                for stream in streams.values():
+                    stream.close()
+                return
+
+        for stream_id in ready:
+            stream = streams.get(stream_id)
+            if stream is None:
+                continue
+            if stream.run():
+                backed_up.add(stream_id)
+            else:
+                backed_up.discard(stream_id)
+            conn.send(("ready", stream_id))
+
+
+class DspStream:
+    """One audio stream (e.g. one room's microphone) processed in a worker"""
+
+    def __init__(self, pool, worker_index, stream_id, capacity):
+        self._pool = pool
+        self._worker_index = worker_index
+        self._worker = pool._conns[worker_index]
+        self.stream_id = stream_id
+        self.input = SharedRing(capacity)
+        self.output = SharedRing(capacity)
+        self.reference = SharedRing(capacity)
+        self.dropped_reference = 0
+        self.failed = False
+        self._progress = asyncio.Event()
+
+    def push_reference(self, samples):
+        """Queue the agent's outbound audio, dropped if the worker is too far behind"""
+        if not self.reference.write(_as_int16(samples)):
+            self.dropped_reference += len(samples)
+
+    def clear_reference(self):
+        """Drop queued reference audio that will never play; the ring is drained by the worker"""
+        if not self.failed:
+            self._worker.send(("clear_reference", self.stream_id))
+
+    async def process(self, samples):
+        """Run samples through the worker's stages and return the same number of samples"""
+        samples = _as_int16(samples)
+        while not self.input.write(samples):
+            # Backpressure: wait for the worker to drain the input ring
+            self._check_worker()
+            self._progress.clear()
+            await self._progress.wait()
+        self._check_worker()
+        self._worker.send(("data", self.stream_id))
+
+        chunks, received = [], 0
+        while received < len(samples):
+            self._check_worker()
+            chunk = self.output.read(len(samples) - received)
+            if len(chunk):
+                chunks.append(chunk)
+                received += len(chunk)
+                continue
+            self._progress.clear()
+            if self.output.readable:
+                continue
+            await self._progress.wait()
+        return np.concatenate(chunks)
+
+    def _check_worker(self):
+        if self.failed:
+            raise RuntimeError(f"DSP worker for stream {self.stream_id} exited")
+
+    def _notify(self):
+        self._progress.set()
+
+    def close(self):
+        self._pool._close_stream(self)
+
+
+class InlineStream:
+    """Same interface as DspStream, but runs the stages directly on the event loop"""
+
+    def __init__(self, stage_specs):
+        self.stages = _build_stages(stage_specs)
+
+    def push_reference(self, samples):
+        for stage in self.stages:
+            if hasattr(stage, "push_reference"):
+                stage.push_reference(samples)
+
+    def clear_reference(self):
+        for stage in self.stages:
+            if hasattr(stage, "clear_reference"):
+                stage.clear_reference()
+
+    async def process(self, samples):
+        for stage in self.stages:
+            samples = stage.process(samples)
+        return np.asarray(samples, dtype=np.int16)
+
+    def close(self):
+        pass
+
+
+class FallbackStream:
+    """A DspStream that carries on in-loop if its worker dies, rather than failing the caller"""
+
+    def __init__(self, stream, stage_specs):
+        self.stream = stream
+        self.stage_specs = stage_specs
+        self.fell_back = False
+
+    def push_reference(self, samples):
+        self.stream.push_reference(samples)
+
+    def clear_reference(self):
+        try:
+            self.stream.clear_reference()
+        except (BrokenPipeError, OSError):
+            # The worker is gone; process() switches to in-loop on the next frame
+            pass
+
+    async def process(self, samples):
+        try:
+            return await self.stream.process(samples)
+        except (RuntimeError, OSError) as e:
+            if self.fell_back:
+                raise
+            # The stages start over (e.g. the echo canceller re-converges), but audio keeps flowing
+            print(f"⚠️  {e}; running its DSP stages on the event loop from now on")
+            self.stream.close()
+            self.stream = InlineStream(self.stage_specs)
+            self.fell_back = True
+            return await self.stream.process(samples)
+
+    def close(self):
+        self.stream.close()
+
+
+class DspPool:
+    """Pool of DSP worker processes that streams are spread across"""
+
+    def __init__(self, stage_specs, workers=2, ring_seconds=1.0, sample_rate=24000):
+        self.stage_specs = stage_specs
+        self.workers = workers
+        self._capacity = int(ring_seconds * sample_rate)
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = []
+        self._conns = []
+        self._load = []
+        self._streams = {}
+        self._next_id = 0
+        self._loop = None
+
+    def start(self):
+        """Spawn the worker processes and hook their pipes into the running loop"""
+        self._loop = asyncio.get_running_loop()
+        for _ in range(self.workers):
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(
+                target=_worker_main, args=(child_conn, self.stage_specs), daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._loop.add_reader(parent_conn.fileno(), self._on_worker_message, parent_conn)
+            self._processes.append(process)
+            self._conns.append(parent_conn)
+            self._load.append(0)
+
+    def open_stream(self):
+        """Create a stream on the least loaded worker"""
+        index = self._load.index(min(self._load))
+        self._load[index] += 1
+        stream = DspStream(self, index, self._next_id, self._capacity)
+        self._streams[stream.stream_id] = stream
+        self._next_id += 1
+        self._conns[index].send((
+            "open", stream.stream_id,
+            stream.input.name, stream.output.name, stream.reference.name,
+        ))
+        return stream
+
+    def _close_stream(self, stream):
+        if self._streams.pop(stream.stream_id, None) is None:
+            return
+        self._load[stream._worker_index] -= 1
+        if not stream.failed:
+            self._conns[stream._worker_index].send(("close", stream.stream_id))
+        # Unlinking only removes the name, the worker's mapping stays valid
+        # until it handles the close message
+        for ring in (stream.input, stream.output, stream.reference):
+            ring.close()
+
+    def _on_worker_message(self, conn):
+        try:
+            while conn.poll():
+                _, stream_id = conn.recv()
+                stream = self._streams.get(stream_id)
+                if stream:
+                    stream._notify()
+        except (EOFError, OSError):
+            # Worker died: fail its streams instead of leaving them waiting forever
+            self._loop.remove_reader(conn.fileno())
+            for stream in self._streams.values():
+                if stream._worker is conn:
+                    stream.failed = True
+                    stream._notify()
+
+    def stop(self):
+        """Close all streams and shut the workers down"""
+        for stream in list(self._streams.values()):
+            stream.close()
+        for conn, process in zip(self._conns, self._processes):
+            self._loop.remove_reader(conn.fileno())
+            try:
+                conn.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self._processes, self._conns, self._load = [], [], []
+
+
+async def _measure_loop_lag(stop, lags, interval=0.005):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - started - interval)
+
+
+async def _run_rooms(make_stream, rooms, seconds, sample_rate, reference, mic):
+    frame = sample_rate // 100
+    stop = asyncio.Event()
+    lags, late_frames = [], [0]
+
+    async def room(offset):
+        stream = make_stream()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for index in range(int(seconds * 100)):
+            at = (offset + index * frame) % (len(mic) - frame)
+            stream.push_reference(reference[at:at + frame])
+            await stream.process(mic[at:at + frame])
+            due = start + (index + 1) * 0.01
+            if loop.time() > due + 0.02:
+                late_frames[0] += 1
+            await asyncio.sleep(max(0.0, due - loop.time()))
+        stream.close()
+
+    ticker = asyncio.create_task(_measure_loop_lag(stop, lags))
+    await asyncio.gather(*(room(r * 997) for r in range(rooms)))
+    stop.set()
+    await ticker
+    lags_ms = np.array(lags) * 1000
+    return np.percentile(lags_ms, 99), lags_ms.max(), late_frames[0] / (rooms * seconds * 100)
+
+
+async def _benchmark(room_counts, seconds, workers):
+    from echo_canceller import EchoCanceller, _synthetic_echo
+
+    sample_rate = 24000
+    reference, mic = _synthetic_echo(sample_rate, seconds=10.0)
+    reference = (reference * 32767).astype(np.int16)
+    mic = (mic * 32767).astype(np.int16)
+    stages = [(EchoCanceller, {"sample_rate": sample_rate})]
+
+    pool = DspPool(stages, workers=workers, sample_rate=sample_rate)
+    pool.start()
+    print(f"{'rooms':>5}  {'mode':<9} {'lag p99':>9} {'lag max':>9} {'late frames':>12}")
+    try:
+        for rooms in room_counts:
+            for mode, make_stream in (("in-loop", lambda: InlineStream(stages)),
+                                      ("offload", pool.open_stream)):
+                p99, worst, late = await _run_rooms(
+                    make_stream, rooms, seconds, sample_rate, reference, mic
+                )
+                print(f"{rooms:>5}  {mode:<9} {p99:>7.1f}ms {worst:>7.1f}ms {100 * late:>11.1f}%")
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    # python dsp_pool.py [workers]
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(1, multiprocessing.cpu_count() - 1)
+    print(f"echo cancellation per room, {workers} DSP worker(s), {multiprocessing.cpu_count()} CPU(s)")
+    started = time.perf_counter()
+    asyncio.run(_benchmark([1, 4, 16, 32, 48], seconds=3.0, workers=workers))
+    print(f"done in {time.perf_counter() - started:.1f} s")
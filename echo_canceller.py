@@ -0,0 +1,370 @@
+import sys
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+# Streaming acoustic echo canceller for the agent's own voice.
+#
+# The agent's outbound audio (what SPARK says) is pushed in as the reference
+# signal, the room microphone audio is pushed through process(), and the
+# estimated echo of SPARK's voice is subtracted before the audio reaches the
+# realtime model. The filter is a partitioned-block frequency-domain NLMS
+# (overlap-save), so each block costs a handful of FFTs regardless of how long
+# the room echo tail is.
+
+
+class EchoCanceller:
+    """Partitioned-block frequency-domain NLMS echo canceller"""
+
+    def __init__(self, sample_rate=24000, block_size=256, filter_blocks=12,
+                 step_size=0.3, bulk_delay=0.0, max_reference_delay=1.0,
+                 double_talk_threshold=0.5, double_talk_hangover=0.25):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.filter_blocks = filter_blocks
+        self.step_size = step_size
+        self.double_talk_threshold = double_talk_threshold
+        # Peaks only cross the threshold now and then during speech, so keep
+        # adaptation frozen for a while after each detection
+        self._hangover_blocks = int(double_talk_hangover * sample_rate / block_size)
+        self._hangover = 0
+        self._pending_update = None
+
+        bins = block_size + 1
+        self._weights = np.zeros((filter_blocks, bins), dtype=np.complex128)
+        self._ref_spectra = np.zeros((filter_blocks, bins), dtype=np.complex128)
+        self._ref_power = np.full(bins, 1e-2)
+        self._prev_ref_block = np.zeros(block_size)
+        self._ref_history_peak = deque(maxlen=filter_blocks)
+
+        # Reference samples not yet matched with microphone samples. Bounded so
+        # a stalled microphone cannot make the canceller hold unbounded audio.
+        self._max_ref_samples = int(max_reference_delay * sample_rate)
+        # Fixed playout + network delay the adaptive filter does not have to learn
+        self._bulk_delay_samples = int(bulk_delay * sample_rate)
+        self._ref_fifo = np.zeros(0)
+        self._mic_fifo = np.zeros(0)
+        # Output is delayed by exactly one block so every call returns as many
+        # samples as it was given.
+        self._out_fifo = np.zeros(block_size)
+
+        self.blocks_processed = 0
+        self.adapted_blocks = 0
+        self.cpu_seconds = 0.0
+        self.mic_energy = 0.0
+        self.residual_energy = 0.0
+
+    @property
+    def latency_ms(self):
+        """Delay added to the microphone path, in milliseconds"""
+        return 1000.0 * self.block_size / self.sample_rate
+
+    @property
+    def erle_db(self):
+        """Echo return loss enhancement measured so far"""
+        if self.residual_energy <= 0.0:
+            return 0.0
+        return 10.0 * np.log10(self.mic_energy / self.residual_energy + 1e-12)
+
+    def push_reference(self, samples):
+        """Queue audio the agent is playing out (float or int16 samples)"""
+        samples = _as_float(samples)
+        if len(self._ref_fifo) == 0 and self._bulk_delay_samples:
+            # Start of a new utterance: re-apply the bulk delay
+            samples = np.concatenate((np.zeros(self._bulk_delay_samples), samples))
+        self._ref_fifo = np.concatenate((self._ref_fifo, samples))
+        if len(self._ref_fifo) > self._max_ref_samples:
+            self._ref_fifo = self._ref_fifo[-self._max_ref_samples:]
+
+    def process(self, samples):
+        """Remove the agent's echo from microphone audio, returns the same number of samples"""
+        is_int16 = np.asarray(samples).dtype == np.int16
+        mic = _as_float(samples)
+        started = time.process_time()
+
+        self._mic_fifo = np.concatenate((self._mic_fifo, mic))
+        outputs = [self._out_fifo]
+        while len(self._mic_fifo) >= self.block_size:
+            block = self._mic_fifo[:self.block_size]
+            self._mic_fifo = self._mic_fifo[self.block_size:]
+            outputs.append(self._process_block(block))
+
+        out = np.concatenate(outputs)
+        self._out_fifo = out[len(mic):]
+        out = out[:len(mic)]
+
+        self.cpu_seconds += time.process_time() - started
+        if is_int16:
+            return np.clip(out * 32768.0, -32768, 32767).astype(np.int16)
+        return out
+
+    def clear_reference(self):
+        """Drop queued reference audio that will never play, e.g. after a barge-in
+
+        Otherwise it is paired with later microphone audio and subtracted from
+        whoever is talking as a phantom echo. The learned echo path is kept.
+        """
+        self._ref_fifo = np.zeros(0)
+        self._pending_update = None
+
+    def reset(self):
+        """Forget the learned echo path, e.g. after the room or speaker changes"""
+        self._weights[:] = 0
+        self._pending_update = None
+        self._ref_spectra[:] = 0
+        self._prev_ref_block[:] = 0
+        self._ref_history_peak.clear()
+        self._ref_fifo = np.zeros(0)
+
+    def _next_reference_block(self):
+        n = self.block_size
+        if len(self._ref_fifo) >= n:
+            block = self._ref_fifo[:n]
+            self._ref_fifo = self._ref_fifo[n:]
+            return block
+        # Agent is silent (or playout is late): pad with zeros
+        block = np.zeros(n)
+        block[:len(self._ref_fifo)] = self._ref_fifo
+        self._ref_fifo = np.zeros(0)
+        return block
+
+    def _process_block(self, mic_block):
+        n = self.block_size
+        ref_block = self._next_reference_block()
+        self._ref_history_peak.append(np.max(np.abs(ref_block)))
+
+        spectrum = np.fft.rfft(np.concatenate((self._prev_ref_block, ref_block)))
+        self._prev_ref_block = ref_block
+        self._ref_spectra = np.roll(self._ref_spectra, 1, axis=0)
+        self._ref_spectra[0] = spectrum
+
+        echo_estimate = np.fft.irfft(np.sum(self._weights * self._ref_spectra, axis=0))[n:]
+        error = mic_block - echo_estimate
+
+        self.blocks_processed += 1
+        self.mic_energy += float(np.dot(mic_block, mic_block))
+        self.residual_energy += float(np.dot(error, error))
+
+        partition_power = np.sum(np.abs(self._ref_spectra) ** 2, axis=0)
+        self._ref_power = 0.5 * self._ref_power + 0.5 * partition_power
+        ref_peak = max(self._ref_history_peak)
+        if ref_peak <= 1e-4:
+            # Agent silent, nothing to learn the echo path from
+            self._pending_update = None
+        elif self._is_double_talk(mic_block, ref_peak) or self._hangover > 0:
+            self._hangover = max(self._hangover - 1, 0)
+            # The previous block may have held the quiet start of the double talk
+            self._pending_update = None
+        else:
+            # Each update waits one block, and is applied only if that block
+            # is clean too, so the onset of someone talking is never learned
+            if self._pending_update is not None:
+                self._weights += self._pending_update
+                self.adapted_blocks += 1
+            self._pending_update = self._weight_update(error)
+
+        return error
+
+    def _is_double_talk(self, mic_block, ref_peak):
+        # Geigel detector: the echo path attenuates, so a microphone peak above
+        # threshold * the agent's recent peak must include someone in the room.
+        if np.max(np.abs(mic_block)) > self.double_talk_threshold * ref_peak:
+            self._hangover = self._hangover_blocks
+            return True
+        return False
+
+    def _weight_update(self, error):
+        n = self.block_size
+        error_spectrum = np.fft.rfft(np.concatenate((np.zeros(n), error)))
+        # Bins the agent barely excites get a regularised step so they cannot blow up
+        floor = 0.05 * np.mean(self._ref_power) + 1e-6
+        normalised = self.step_size * error_spectrum / (self._ref_power + floor)
+        gradient = np.conj(self._ref_spectra) * normalised
+        # Gradient constraint keeps each partition a linear (not circular) filter
+        constrained = np.fft.irfft(gradient, axis=1)
+        constrained[:, n:] = 0
+        return np.fft.rfft(constrained, axis=1)
+
+
+def _as_float(samples):
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float64) / 32768.0
+    return samples.astype(np.float64)
+
+
+def resample_linear(samples, from_rate, to_rate):
+    """Cheap linear resampler for aligning the reference with the microphone rate"""
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    length = int(round(len(samples) * to_rate / from_rate))
+    positions = np.linspace(0, len(samples) - 1, length)
+    resampled = np.interp(positions, np.arange(len(samples)), samples)
+    if np.asarray(samples).dtype == np.int16:
+        return np.round(resampled).astype(np.int16)
+    return resampled
+
+
+def count_turns(samples, sample_rate, threshold_db=-40.0, min_speech=0.25, min_gap=0.5):
+    """Count speech-like segments with a simple energy gate, a proxy for model turns"""
+    frame = int(0.02 * sample_rate)
+    frames = len(samples) // frame
+    if frames == 0:
+        return 0
+    energy = np.mean(samples[:frames * frame].reshape(frames, frame) ** 2, axis=1)
+    active = 10.0 * np.log10(energy + 1e-12) > threshold_db
+
+    turns, run, gap = 0, 0, min_gap
+    for is_active in active:
+        if is_active:
+            run += 1
+            if run * 0.02 >= min_speech and gap >= min_gap:
+                turns += 1
+                gap = 0.0
+        else:
+            if run:
+                gap = 0.0
+            run = 0
+            gap += 0.02
+    return turns
+
+
+def _read_wav(path):
+    with wave.open(path, "rb") as f:
+        rate = f.getframerate()
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        if f.getnchannels() > 1:
+            data = data[::f.getnchannels()]
+    return rate, _as_float(data)
+
+
+def _synthetic_echo(sample_rate, seconds=20.0, seed=7):
+    """Speech-like reference plus a delayed, reverberant copy as the microphone signal"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    # Bursty, pitched "speech": 1.5 s talk spurts separated by 1 s silences
+    envelope = ((t % 2.5) < 1.5) * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2)
+    voiced = np.sin(2 * np.pi * 140 * t) + 0.5 * np.sin(2 * np.pi * 280 * t)
+    reference = 0.3 * envelope * (voiced + 0.3 * rng.standard_normal(n))
+
+    delay = int(0.04 * sample_rate)
+    tail = int(0.08 * sample_rate)
+    impulse = np.zeros(delay + tail)
+    impulse[delay:] = rng.standard_normal(tail) * np.exp(-np.arange(tail) / (0.015 * sample_rate))
+    # About 10 dB of loss between the PA speakers and the room microphones
+    impulse *= np.sqrt(0.1 / np.sum(impulse ** 2))
+    mic = np.convolve(reference, impulse)[:n] + 1e-3 * rng.standard_normal(n)
+    return reference, mic
+
+
+def benchmark(reference, mic, sample_rate, frame_ms=10):
+    """Replay reference/microphone audio frame by frame and report AEC cost and effect"""
+    canceller = EchoCanceller(sample_rate=sample_rate)
+    frame = int(sample_rate * frame_ms / 1000)
+    cleaned = []
+    for start in range(0, min(len(reference), len(mic)), frame):
+        canceller.push_reference(reference[start:start + frame])
+        cleaned.append(canceller.process(mic[start:start + frame]))
+    cleaned = np.concatenate(cleaned)
+
+    seconds = len(cleaned) / sample_rate
+    # Skip the first seconds while the filter converges when reporting ERLE
+    settled = int(min(5.0, seconds / 4) * sample_rate)
+    erle = 10 * np.log10(np.sum(mic[settled:len(cleaned)] ** 2) / (np.sum(cleaned[settled:] ** 2) + 1e-12))
+
+    print(f"audio replayed:       {seconds:.1f} s @ {sample_rate} Hz")
+    print(f"CPU per stream:       {100 * canceller.cpu_seconds / seconds:.2f} % of one core")
+    print(f"added latency:        {canceller.latency_ms:.1f} ms")
+    print(f"ERLE (converged):     {erle:.1f} dB")
+    print(f"false turns raw:      {count_turns(mic, sample_rate)}")
+    print(f"false turns with AEC: {count_turns(cleaned[settled:], sample_rate)}"
+          f" (+{count_turns(cleaned[:settled], sample_rate)} while converging)")
+
+
+def double_talk_benchmark(sample_rate=24000, seconds=20.0, seed=7):
+    """Host talks over SPARK at about the same level: adaptation should freeze meanwhile"""
+    reference, echo = _synthetic_echo(sample_rate, seconds, seed)
+    n = len(reference)
+    t = np.arange(n) / sample_rate
+    # Host speech from 10-12 s and 15-17 s, as loud as SPARK's own output
+    host_active = ((t >= 10) & (t < 12)) | ((t >= 15) & (t < 17))
+    host = host_active * (0.5 + 0.5 * np.sin(2 * np.pi * 5 * t) ** 2) * (
+        np.sin(2 * np.pi * 210 * t) + 0.4 * np.sin(2 * np.pi * 630 * t))
+    host *= np.sqrt(np.mean(reference ** 2) / (np.mean(host[host_active] ** 2) + 1e-12))
+    mic = echo + host
+
+    def run(mic_signal):
+        canceller = EchoCanceller(sample_rate=sample_rate)
+        frame = int(sample_rate * 0.01)
+        adapted = host_blocks = 0
+        cleaned = []
+        for start in range(0, n, frame):
+            blocks, adapted_before = canceller.blocks_processed, canceller.adapted_blocks
+            canceller.push_reference(reference[start:start + frame])
+            cleaned.append(canceller.process(mic_signal[start:start + frame]))
+            if host_active[start]:
+                host_blocks += canceller.blocks_processed - blocks
+                adapted += canceller.adapted_blocks - adapted_before
+        return canceller, np.concatenate(cleaned), adapted, host_blocks
+
+    _, clean_ref, _, _ = run(echo)
+    canceller, cleaned, adapted, host_blocks = run(mic)
+    # Echo left after the double talk, compared with a run without any
+    after = t >= 17.5
+    residual = cleaned[after] - host[after]
+    erle_after = 10 * np.log10(np.sum(echo[after] ** 2) / (np.sum(residual ** 2) + 1e-12))
+    erle_clean = 10 * np.log10(np.sum(echo[after] ** 2) / (np.sum(clean_ref[after] ** 2) + 1e-12))
+    print(f"double talk: adapted on {adapted} of {host_blocks} host-speech blocks")
+    print(f"ERLE after double talk: {erle_after:.1f} dB (no double talk: {erle_clean:.1f} dB)")
+
+
+def barge_in_benchmark(sample_rate=24000, seed=7, unplayed=0.2):
+    """Barge-in: reference queued for playout is dropped and never heard by the room"""
+    reference, echo = _synthetic_echo(sample_rate, 10.0, seed)
+    t = np.arange(sample_rate) / sample_rate
+    # One second of the user talking, quieter than SPARK, with no echo at all
+    user = 0.3 * np.sqrt(np.mean(reference ** 2) * 2) * (0.5 + 0.5 * np.sin(2 * np.pi * 5 * t) ** 2) * (
+        np.sin(2 * np.pi * 210 * t) + 0.4 * np.sin(2 * np.pi * 630 * t))
+    frame = int(sample_rate * 0.01)
+    # SPARK was about to start a talk spurt when it was interrupted
+    queued = 0.3 * np.sin(2 * np.pi * 140 * np.arange(int(unplayed * sample_rate)) / sample_rate)
+
+    def run(clear):
+        canceller = EchoCanceller(sample_rate=sample_rate)
+        for start in range(0, len(reference), frame):
+            canceller.push_reference(reference[start:start + frame])
+            canceller.process(echo[start:start + frame])
+        canceller.push_reference(queued)
+        if clear:
+            canceller.clear_reference()
+        adapted = canceller.adapted_blocks
+        cleaned = np.concatenate([canceller.process(user[start:start + frame])
+                                  for start in range(0, len(user), frame)])
+        # Output lags by one block: whatever differs from the user's speech was injected
+        injected = cleaned[canceller.block_size:] - user[:-canceller.block_size]
+        level = 10 * np.log10(np.sum(injected ** 2) / np.sum(user ** 2) + 1e-12)
+        return level, canceller.adapted_blocks - adapted
+
+    kept, kept_adapted = run(clear=False)
+    cleared, cleared_adapted = run(clear=True)
+    print(f"barge-in, {1000 * unplayed:.0f} ms unplayed reference: injected {cleared:.1f} dB relative to the"
+          f" user, adapted on {cleared_adapted} blocks (not cleared: {kept:+.1f} dB, {kept_adapted} blocks)")
+    assert cleared < -40.0 and cleared_adapted == 0, "unplayed reference must not reach the user's speech"
+
+
+if __name__ == "__main__":
+    # python echo_canceller.py [agent_output.wav room_mic.wav]
+    if len(sys.argv) == 3:
+        ref_rate, reference = _read_wav(sys.argv[1])
+        rate, mic = _read_wav(sys.argv[2])
+        reference = resample_linear(reference, ref_rate, rate)
+    else:
+        rate = 24000
+        reference, mic = _synthetic_echo(rate)
+    benchmark(reference, mic, rate)
+    if len(sys.argv) != 3:
+        double_talk_benchmark(rate)
+        barge_in_benchmark(rate)
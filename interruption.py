@@ -0,0 +1,270 @@
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from echo_canceller import _as_float, _read_wav
+
+# Barge-in classifier for noisy halls.
+#
+# While SPARK is speaking, every inbound frame is scored on three things:
+# energy above an adaptive noise floor (is anything loud happening?), spectral
+# flatness over the voice band (voiced speech has harmonic peaks, applause and
+# crowd noise are close to flat) and duration (a real interruption keeps going,
+# a cough or a single clap does not). Only an overlap with enough speech-like
+# frames within a short window counts as the user talking over SPARK; anything
+# else is rejected without the session ever seeing it.
+
+IDLE = "idle"
+CANDIDATE = "candidate"
+INTERRUPT = "interrupt"
+
+
+class InterruptionClassifier:
+    """Decides whether loud audio during agent speech is a real interruption"""
+
+    def __init__(self, sample_rate=24000, frame_ms=10, energy_margin_db=12.0,
+                 flatness_threshold=0.15, min_speech_ms=160, window_ms=400, max_gap_ms=150,
+                 floor_window_s=4.0, fft_size=1024, band=(150.0, 4000.0)):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.energy_margin_db = energy_margin_db
+        self.flatness_threshold = flatness_threshold
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_gap_frames = max(1, max_gap_ms // frame_ms)
+
+        # Long enough to resolve the harmonics of a low voice
+        self._window = np.hanning(fft_size)
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+        self._band = (freqs >= band[0]) & (freqs <= band[1])
+        self._history = np.zeros(fft_size)
+        self._pending = np.zeros(0)
+
+        # Recent frame energies; the noise floor is a low percentile of them, so
+        # sustained crowd noise becomes the floor while short events stay above it
+        self._energies = deque([-70.0], maxlen=int(floor_window_s * 1000 / frame_ms))
+        self.noise_floor_db = -70.0
+        self._frames_seen = 0
+        self.state = IDLE
+        self._speechlike = deque(maxlen=max(1, window_ms // frame_ms))
+        self._quiet_frames = 0
+        self._onset = 0.0
+        self._time = 0.0
+
+        self.overlaps = 0
+        self.interruptions = 0
+        self.rejected = 0
+        self.decision_latencies = []
+        self.cpu_seconds = 0.0
+
+    def process(self, samples, speaking=True):
+        """Feed inbound audio, returns IDLE, CANDIDATE or INTERRUPT for the latest frame
+
+        With speaking=False only the noise floor is tracked and any open
+        overlap is dropped, since talking while SPARK is quiet is a normal turn.
+        """
+        started = time.perf_counter()
+        self._pending = np.concatenate([self._pending, _as_float(samples)])
+        count = len(self._pending) // self.frame_samples
+        for index in range(count):
+            self._frame(self._pending[index * self.frame_samples:(index + 1) * self.frame_samples], speaking)
+        self._pending = self._pending[count * self.frame_samples:]
+        self.cpu_seconds += time.perf_counter() - started
+        return self.state
+
+    @property
+    def rejection_rate(self):
+        """Share of overlaps that were rejected rather than passed to the session"""
+        return self.rejected / self.overlaps if self.overlaps else 0.0
+
+    def _frame(self, frame, speaking):
+        self._time += self.frame_ms / 1000.0
+        self._history = np.concatenate([self._history[len(frame):], frame])
+        energy_db = 10.0 * np.log10(np.mean(frame ** 2) + 1e-12)
+        loud = energy_db > self.noise_floor_db + self.energy_margin_db
+        self._energies.append(energy_db)
+        self._frames_seen += 1
+        if self._frames_seen % 10 == 0:
+            self.noise_floor_db = float(np.percentile(self._energies, 10))
+
+        if not speaking:
+            self._end_overlap(rejected=False)
+            return
+        if self.state == IDLE:
+            if not loud:
+                return
+            self.state = CANDIDATE
+            self.overlaps += 1
+            self._onset = self._time - self.frame_ms / 1000.0
+
+        self._quiet_frames = 0 if loud else self._quiet_frames + 1
+        if self._quiet_frames > self.max_gap_frames:
+            self._end_overlap()
+            return
+        if self.state == CANDIDATE:
+            self._speechlike.append(loud and self._flatness() < self.flatness_threshold)
+            if sum(self._speechlike) >= self.min_speech_frames:
+                self.state = INTERRUPT
+                self.interruptions += 1
+                self.decision_latencies.append(self._time - self._onset)
+
+    def _end_overlap(self, rejected=True):
+        if self.state == CANDIDATE and rejected:
+            self.rejected += 1
+        self.state = IDLE
+        self._speechlike.clear()
+        self._quiet_frames = 0
+
+    def _flatness(self):
+        power = np.abs(np.fft.rfft(self._history * self._window))[self._band] ** 2 + 1e-20
+        return float(np.exp(np.mean(np.log(power))) / np.mean(power))
+
+
+def _voice(seconds, sample_rate, rng, f0=None, level=0.1):
+    """Speech-like audio: voiced harmonics with drifting pitch, breath noise and unvoiced consonants"""
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    f0 = f0 or rng.uniform(95, 230)
+    pitch = f0 * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(0.3, 1.2) * t + rng.uniform(0, 6)))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, int(4000 / f0)))
+    voiced = voiced + 0.15 * rng.standard_normal(n)
+    # 4-6 syllables a second; the dips between them are partly fricatives
+    rate = rng.uniform(4, 6)
+    syllable = np.abs(np.sin(np.pi * rate * t + rng.uniform(0, 3)))
+    unvoiced = syllable < 0.3
+    signal = np.where(unvoiced, 0.4 * rng.standard_normal(n), voiced * (0.35 + 0.65 * syllable))
+    return level * signal / (np.sqrt(np.mean(signal ** 2)) + 1e-12)
+
+
+def _applause(seconds, sample_rate, rng, level=0.1, claps_per_second=150):
+    """Many overlapping claps: short broadband bursts at random times"""
+    n = int(seconds * sample_rate)
+    signal = np.zeros(n + sample_rate // 50)
+    clap = np.exp(-np.arange(sample_rate // 50) / (0.003 * sample_rate))
+    for start in rng.integers(0, n, int(seconds * claps_per_second)):
+        signal[start:start + len(clap)] += clap * rng.standard_normal(len(clap)) * rng.uniform(0.3, 1.0)
+    signal = signal[:n]
+    return level * signal / (np.sqrt(np.mean(signal ** 2)) + 1e-12)
+
+
+def _murmur(seconds, sample_rate, rng, level=0.02, talkers=12):
+    """Audience babble: many distant voices mixed with room noise"""
+    n = int(seconds * sample_rate)
+    signal = sum(_voice(seconds, sample_rate, rng, level=1.0) for _ in range(talkers))
+    signal = signal + 0.5 * np.sqrt(talkers) * rng.standard_normal(n)
+    return level * signal / (np.sqrt(np.mean(signal ** 2)) + 1e-12)
+
+
+def synthetic_hall(sample_rate=24000, events=120, seed=11):
+    """Hall ambience with labelled overlap events, as if SPARK were speaking throughout
+
+    Returns (audio, [(start, end, is_speech), ...]).
+    """
+    rng = np.random.default_rng(seed)
+    kinds = ["speech", "applause", "murmur", "cough", "speech_in_applause"]
+    pieces, labels, now = [], [], 0.0
+    for index in range(events):
+        gap = rng.uniform(1.5, 3.0)
+        kind = kinds[index % len(kinds)]
+        if kind == "speech":
+            length = rng.uniform(0.8, 2.5)
+            event = _voice(length, sample_rate, rng, level=rng.uniform(0.05, 0.2))
+        elif kind == "applause":
+            length = rng.uniform(1.0, 4.0)
+            event = _applause(length, sample_rate, rng, level=rng.uniform(0.05, 0.3))
+        elif kind == "murmur":
+            # The audience gets louder for a while, e.g. reacting to a slide
+            length = rng.uniform(1.5, 4.0)
+            event = _murmur(length, sample_rate, rng, level=rng.uniform(0.03, 0.08))
+        elif kind == "cough":
+            length = rng.uniform(0.1, 0.3)
+            event = _applause(length, sample_rate, rng, level=rng.uniform(0.1, 0.3), claps_per_second=60)
+        else:
+            # The host talks over the tail of a round of applause
+            length = rng.uniform(1.5, 3.0)
+            event = (_applause(length, sample_rate, rng, level=0.06)
+                     + _voice(length, sample_rate, rng, level=rng.uniform(0.1, 0.2)))
+        fade = np.minimum(1.0, np.minimum(np.arange(len(event)), np.arange(len(event))[::-1]) / (0.02 * sample_rate))
+        pieces.append(np.zeros(int(gap * sample_rate)))
+        pieces.append(event * fade)
+        labels.append((now + gap, now + gap + length, kind.startswith("speech")))
+        now += gap + length
+    pieces.append(np.zeros(sample_rate))
+    audio = np.concatenate(pieces)
+    return audio + _murmur(len(audio) / sample_rate, sample_rate, rng, level=0.004, talkers=4), labels
+
+
+def _energy_gate(sample_rate, min_speech_ms=500, margin_db=12.0):
+    """What the session does without the classifier: loud for min_speech_ms means interrupt"""
+    return InterruptionClassifier(sample_rate=sample_rate, energy_margin_db=margin_db,
+                                  flatness_threshold=1.01, min_speech_ms=min_speech_ms,
+                                  window_ms=min_speech_ms)
+
+
+def evaluate(audio, labels, classifier, sample_rate, frame_ms=10):
+    """Replay labelled hall audio; returns (false interruptions, noise events, detected, speech events, latencies)"""
+    frame = sample_rate * frame_ms // 1000
+    fired_at = []
+    previous = IDLE
+    for start in range(0, len(audio), frame):
+        state = classifier.process(audio[start:start + frame])
+        if state == INTERRUPT and previous != INTERRUPT:
+            fired_at.append(start / sample_rate)
+        previous = state
+
+    false_hits = detected = 0
+    latencies = []
+    for begin, end, is_speech in labels:
+        hits = [t for t in fired_at if begin - 0.05 <= t <= end + 0.2]
+        if is_speech:
+            if hits:
+                detected += 1
+                latencies.append(hits[0] - begin)
+        elif hits:
+            false_hits += 1
+    noise_events = sum(1 for *_, is_speech in labels if not is_speech)
+    return false_hits, noise_events, detected, len(labels) - noise_events, latencies
+
+
+def benchmark(audio, labels, sample_rate):
+    seconds = len(audio) / sample_rate
+    print(f"hall audio: {seconds:.0f} s, {len(labels)} overlaps "
+          f"({sum(1 for *_, s in labels if s)} speech, {sum(1 for *_, s in labels if not s)} noise)")
+    print(f"{'detector':<30} {'false interruptions':>20} {'missed':>8} {'latency p50':>12} {'p95':>8} {'CPU':>7}")
+    for name, classifier in (
+        ("energy gate, 500 ms (default)", _energy_gate(sample_rate)),
+        ("energy gate, 200 ms", _energy_gate(sample_rate, min_speech_ms=200)),
+        ("energy+flatness+duration", InterruptionClassifier(sample_rate=sample_rate)),
+    ):
+        false_hits, noise, detected, speech, latencies = evaluate(audio, labels, classifier, sample_rate)
+        latencies = sorted(1000 * latency for latency in latencies) or [float("nan")]
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{name:<30} {false_hits:>4}/{noise:<3} ({100 * false_hits / max(noise, 1):>5.1f} %)"
+              f" {speech - detected:>8} {p50:>9.0f} ms {p95:>5.0f} ms"
+              f" {100 * classifier.cpu_seconds / seconds:>5.2f} %")
+
+
+def _read_labels(path):
+    """One overlap per line: start_seconds end_seconds speech|noise"""
+    labels = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                begin, end, kind = line.split()[:3]
+                labels.append((float(begin), float(end), kind == "speech"))
+    return labels
+
+
+if __name__ == "__main__":
+    # python interruption.py [hall.wav labels.txt]  - labels: "start end speech|noise" per line
+    if len(sys.argv) == 3:
+        rate, audio = _read_wav(sys.argv[1])
+        benchmark(audio, _read_labels(sys.argv[2]), rate)
+    else:
+        rate = 24000
+        audio, labels = synthetic_hall(rate)
+        benchmark(audio, labels, rate)
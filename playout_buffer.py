@@ -0,0 +1,234 @@
+import sys
+from collections import deque
+
+import numpy as np
+
+# Adaptive playout (jitter) buffer for SPARK's outbound speech.
+#
+# The realtime model streams audio in bursts: half a second arrives at once,
+# then nothing for a while. Pushed straight into the room track that stutters
+# whenever a gap outlasts what is queued. This buffer sits between the model
+# or TTS output and the published track, measures how irregular arrival is and
+# holds just enough audio to ride out the gaps: it grows as soon as arrival
+# gets irregular (a stall widens the spread straight away) and drifts back
+# toward min_depth_ms while arrival is steady, shedding near-silent frames
+# rather than cutting into speech.
+#
+# The target is the spread of (arrival time - position in the utterance) over
+# the last few seconds, the same idea as WebRTC NetEq's relative delay
+# histogram. The spread is taken between two percentiles, not from the
+# minimum: within a burst the first frames are the latest and the last ones
+# the earliest, so the full range would mostly measure burst length.
+
+
+class PlayoutBuffer:
+    """Jitter buffer for one outbound audio stream, driven by an external playout clock"""
+
+    def __init__(self, sample_rate=24000, frame_ms=10, min_depth_ms=40, max_depth_ms=600,
+                 window_s=5.0, spread_percentiles=(45, 85), shed_margin_ms=70,
+                 silence_threshold=0.01):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.min_depth_ms = min_depth_ms
+        self.max_depth_ms = max_depth_ms
+        self.spread_percentiles = spread_percentiles
+        # Depth above the target kept before pauses are skipped, so one early
+        # burst is not shed just before the next gap
+        self.shed_margin_ms = shed_margin_ms
+        self.silence_threshold = silence_threshold
+        self.target_depth_ms = float(min_depth_ms)
+
+        # (arrival time, delay, samples) for every queued frame
+        self._frames = deque()
+        self._queued_samples = 0
+        self._playing = False
+        self._ending = False
+        # Arrival time minus position in the utterance, per chunk. Playout
+        # never runs dry as long as it holds (latest delay - earliest delay)
+        # of audio, so the target tracks the spread of these.
+        self._delays = deque(maxlen=int(window_s * 1000 / frame_ms))
+        self._segment_start = None
+        self._segment_ms = 0.0
+        self._low_water = deque(maxlen=int(2000 / frame_ms))
+
+        self.underruns = 0
+        self.late_frames = 0
+        self.skipped_frames = 0
+        self.frames_played = 0
+        self.max_depth_seen_ms = 0.0
+
+    @property
+    def depth_ms(self):
+        return 1000.0 * self._queued_samples / self.sample_rate
+
+    @property
+    def empty(self):
+        return not self._frames
+
+    def push(self, samples, now):
+        """Queue a chunk of agent audio that arrived at time now (seconds)"""
+        samples = np.asarray(samples)
+        if self._playing and not self._frames:
+            # The playout clock already needed this audio
+            self.late_frames += 1
+        if self._segment_start is None:
+            self._segment_start = now
+            self._segment_ms = 0.0
+        delay = 1000.0 * (now - self._segment_start) - self._segment_ms
+        self._delays.append(delay)
+        self._segment_ms += 1000.0 * len(samples) / self.sample_rate
+        self._update_target()
+
+        for start in range(0, len(samples), self.frame_samples):
+            frame = samples[start:start + self.frame_samples]
+            self._frames.append((now, delay - 1000.0 * start / self.sample_rate, frame))
+            self._queued_samples += len(frame)
+        self.max_depth_seen_ms = max(self.max_depth_seen_ms, self.depth_ms)
+        self._ending = False
+
+    def end_of_segment(self):
+        """The current utterance is complete, play out what is left without waiting"""
+        self._ending = True
+
+    def clear(self):
+        """Drop everything queued, e.g. when the agent is interrupted"""
+        self._frames.clear()
+        self._queued_samples = 0
+        self._playing = False
+        self._ending = False
+        self._segment_start = None
+
+    def pop(self, now):
+        """Next frame for the published track at time now, or None to play silence this tick"""
+        if not self._playing:
+            # Hold the first frame for the target delay so later, slower chunks
+            # have time to arrive, unless the utterance is already complete.
+            if not self._frames:
+                return None
+            arrived, delay, _ = self._frames[0]
+            if 1000.0 * (now - arrived) < self.target_depth_ms and not self._ending:
+                return None
+            self._playing = True
+
+        if not self._frames:
+            self._playing = False
+            if self._ending:
+                self._ending = False
+                self._segment_start = None
+            else:
+                # A gap we could not ride out; its late chunks widen the
+                # spread, so more audio is held from now on
+                self.underruns += 1
+            return None
+
+        self.frames_played += 1
+        self._low_water.append(self.depth_ms)
+        frame = self._pop_frame()
+
+        # Shrink toward the target by skipping pauses between words, never
+        # by dropping speech.
+        while (min(self._low_water) > self.target_depth_ms + self.shed_margin_ms and self._frames
+               and _peak(frame) < self.silence_threshold
+               and _peak(self._frames[0][2]) < self.silence_threshold):
+            frame = self._pop_frame()
+            self.skipped_frames += 1
+            self._low_water.append(self.depth_ms)
+        return frame
+
+    def _pop_frame(self):
+        _, _, frame = self._frames.popleft()
+        self._queued_samples -= len(frame)
+        return frame
+
+    def _update_target(self):
+        early, late = np.percentile(np.fromiter(self._delays, dtype=float), self.spread_percentiles)
+        self.target_depth_ms = min(self.max_depth_ms, max(
+            self.min_depth_ms, late - early + self.frame_ms
+        ))
+
+
+def _peak(frame):
+    if not len(frame):
+        return 0.0
+    peak = float(np.max(np.abs(frame)))
+    return peak / 32768.0 if frame.dtype == np.int16 else peak
+
+
+def synthetic_trace(seconds=60.0, frame_ms=10, seed=3):
+    """Arrival times of each 10 ms frame from a realtime model that streams in bursts"""
+    rng = np.random.default_rng(seed)
+    arrivals = []
+    audio_time, wall = 0.0, 0.0
+    while audio_time < seconds:
+        # Bursts of 100-600 ms of audio delivered at once, sometimes early,
+        # sometimes behind real time, with the odd long stall
+        burst = rng.integers(10, 60)
+        wall = max(wall, audio_time + rng.normal(0.0, 0.06))
+        if rng.random() < 0.05:
+            wall += rng.uniform(0.15, 0.35)
+        for index in range(burst):
+            arrivals.append(wall + index * 0.0005)
+        audio_time += burst * frame_ms / 1000.0
+    return np.array(arrivals)
+
+
+def steady_trace(seconds=60.0, frame_ms=10, seed=3):
+    """Arrival times for audio that streams smoothly, e.g. TTS over a good link"""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * 1000 / frame_ms)
+    return np.arange(frames) * frame_ms / 1000.0 + np.abs(rng.normal(0.0, 0.003, frames))
+
+
+def simulate(arrivals, buffer):
+    """Replay frame arrival times against a 10 ms playout clock, returns when each frame played"""
+    # Speech-like audio: 320 ms of voice, then an 80 ms pause between words
+    voice = np.full(buffer.frame_samples, 8000, dtype=np.int16)
+    pause = np.zeros(buffer.frame_samples, dtype=np.int16)
+    tick = buffer.frame_ms / 1000.0
+    played_at = []
+    next_arrival = 0
+    now = arrivals[0]
+    while len(played_at) < len(arrivals):
+        while next_arrival < len(arrivals) and arrivals[next_arrival] <= now:
+            buffer.push(voice if next_arrival % 40 < 32 else pause, arrivals[next_arrival])
+            next_arrival += 1
+        if next_arrival == len(arrivals):
+            buffer.end_of_segment()
+        before = buffer.skipped_frames
+        if buffer.pop(now) is not None:
+            # Skipped pauses are "played" instantly along with the frame after them
+            played_at.extend([now] * (1 + buffer.skipped_frames - before))
+        now += tick
+    return np.array(played_at)
+
+
+def benchmark(arrivals):
+    print(f"{'buffer':<14} {'added latency':>14} {'underruns':>10} {'late frames':>12} {'max depth':>10}")
+    baseline = None
+    # Fixed buffers hold exactly their depth, shedding anything above it
+    for name, kwargs in (
+        ("none", {"min_depth_ms": 0, "max_depth_ms": 0, "shed_margin_ms": 10}),
+        ("fixed 60 ms", {"min_depth_ms": 60, "max_depth_ms": 60, "shed_margin_ms": 10}),
+        ("fixed 200 ms", {"min_depth_ms": 200, "max_depth_ms": 200, "shed_margin_ms": 10}),
+        ("fixed 400 ms", {"min_depth_ms": 400, "max_depth_ms": 400, "shed_margin_ms": 10}),
+        ("adaptive", {}),
+    ):
+        buffer = PlayoutBuffer(**kwargs)
+        delay = simulate(arrivals, buffer) - arrivals
+        if baseline is None:
+            baseline = delay
+        added = 1000.0 * np.mean(delay - baseline)
+        print(f"{name:<14} {added:>11.0f} ms {buffer.underruns:>10} {buffer.late_frames:>12}"
+              f" {buffer.max_depth_seen_ms:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    # python playout_buffer.py [trace.txt]  - one frame arrival time (seconds) per line
+    if len(sys.argv) == 2:
+        benchmark(np.loadtxt(sys.argv[1]))
+    else:
+        print("bursty realtime-model arrival:")
+        benchmark(synthetic_trace())
+        print("\nsteady arrival:")
+        benchmark(steady_trace())
@@ -0,0 +1,290 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Remote operator control for SPARK.
+#
+# Operators send commands (pause, resume, status, quit, announce <text>) either
+# as LiveKit data messages on CONTROL_TOPIC or as lines on a local Unix socket.
+# Commands are handled directly on the session's event loop, and every state
+# change is published back on STATUS_TOPIC and to all connected socket clients.
+#
+# Both transports accept plain text ("announce Doors close in 5 minutes") or
+# JSON ({"cmd": "announce", "text": "...", "id": 7}); replies are JSON.
+
+CONTROL_TOPIC = "spark.control"
+STATUS_TOPIC = "spark.status"
+COMMANDS = ("pause", "resume", "status", "quit", "announce")
+
+
+def parse_command(payload):
+    """Turn a text or JSON payload into (command, text, request_id)"""
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8", errors="replace")
+    payload = payload.strip()
+    if payload.startswith("{"):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return None, "", None
+        return str(message.get("cmd", "")).lower(), message.get("text", ""), message.get("id")
+    command, _, text = payload.partition(" ")
+    return command.lower(), text.strip(), None
+
+
+class RemoteControl:
+    """Accepts operator commands over the room data channel and a Unix socket"""
+
+    def __init__(self, handlers, room=None, socket_path=None, operators=()):
+        # handlers: command name -> callable(text) returning a reply dict (or awaitable)
+        # operators: participant identities allowed to send room commands, empty allows none
+        self.handlers = handlers
+        self.room = room
+        self.socket_path = socket_path
+        self.operators = frozenset(operators or ())
+        self.commands_handled = 0
+        self._server = None
+        self._clients = set()
+        self._loop = None
+        self._tasks = set()
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self.room is not None:
+            self.room.on("data_received", self._on_data_received)
+            if not self.operators:
+                print("⚠️  No remote operators configured, room control messages will be ignored")
+        if self.socket_path and sys.platform != "win32":
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._server = await asyncio.start_unix_server(self._serve_client, path=self.socket_path)
+            os.chmod(self.socket_path, 0o600)
+            print(f"🛰️ Remote control socket: {self.socket_path}")
+
+    async def stop(self):
+        if self.room is not None:
+            self.room.off("data_received", self._on_data_received)
+        # Close clients first: from Python 3.12.1 wait_closed() waits for open connections
+        for writer in list(self._clients):
+            writer.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def dispatch(self, payload, source="local"):
+        """Run one command and return the JSON-serialisable reply"""
+        command, text, request_id = parse_command(payload)
+        handler = self.handlers.get(command)
+        if handler is None:
+            reply = {"ok": False, "error": f"unknown command '{command}'", "commands": list(COMMANDS)}
+        else:
+            try:
+                reply = handler(text)
+                if asyncio.iscoroutine(reply):
+                    reply = await reply
+                reply = {"ok": True, **(reply or {})}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.commands_handled += 1
+        reply["cmd"] = command
+        if request_id is not None:
+            reply["id"] = request_id
+        print(f"🛰️ [{source}] {command} -> {'ok' if reply['ok'] else reply['error']}")
+        return reply
+
+    def publish_state(self, state):
+        """Broadcast a state change to operators, safe to call from any thread"""
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            running = False
+        if running:
+            self._spawn(self._publish(state))
+        else:
+            self._loop.call_soon_threadsafe(self._spawn, self._publish(state))
+
+    async def _publish(self, state):
+        message = json.dumps({"type": "state", **state})
+        if self.room is not None:
+            try:
+                await self.room.local_participant.publish_data(
+                    message.encode(), reliable=True, topic=STATUS_TOPIC
+                )
+            except Exception as e:
+                print(f"Remote control publish error: {e}")
+        for writer in list(self._clients):
+            writer.write(message.encode() + b"\n")
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_data_received(self, packet):
+        if packet.topic != CONTROL_TOPIC:
+            return
+        identity = packet.participant.identity if packet.participant else None
+        if identity not in self.operators:
+            print(f"⚠️  Ignoring control message from non-operator '{identity}'")
+            return
+        self._spawn(self._handle_data(packet.data, identity))
+
+    async def _handle_data(self, data, identity):
+        reply = await self.dispatch(data, source=f"room:{identity}")
+        await self.room.local_participant.publish_data(
+            json.dumps({"type": "reply", **reply}).encode(),
+            reliable=True,
+            topic=STATUS_TOPIC,
+            destination_identities=[identity] if identity else [],
+        )
+
+    async def _serve_client(self, reader, writer):
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                reply = await self.dispatch(line, source="socket")
+                writer.write(json.dumps({"type": "reply", **reply}).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+
+class LocalRoom:
+    """Stand-in for rtc.Room: delivers data packets in-process and records what is published"""
+
+    class _Participant:
+        def __init__(self, identity):
+            self.identity = identity
+            self.published = []
+
+        async def publish_data(self, payload, reliable=True, topic="", destination_identities=None):
+            self.published.append((topic, payload))
+
+    class _Packet:
+        def __init__(self, data, topic, participant):
+            self.data = data
+            self.topic = topic
+            self.participant = participant
+
+    def __init__(self):
+        self.local_participant = self._Participant("spark")
+        self._listeners = {}
+
+    def on(self, event, callback):
+        self._listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        self._listeners.get(event, []).remove(callback)
+
+    def send_data(self, data, topic, identity="operator"):
+        packet = self._Packet(data, topic, self._Participant(identity))
+        for callback in list(self._listeners.get("data_received", [])):
+            callback(packet)
+
+
+async def _self_check(rounds=200):
+    """Drive pause/resume through a stand-in room and the Unix socket, report latency"""
+    state = {"paused": False, "changed_at": 0.0}
+
+    def set_paused(paused):
+        state["paused"] = paused
+        state["changed_at"] = time.perf_counter()
+        control.publish_state({"paused": paused})
+        return {"paused": paused}
+
+    handlers = {
+        "pause": lambda _: set_paused(True),
+        "resume": lambda _: set_paused(False),
+        "status": lambda _: {"paused": state["paused"]},
+    }
+    room = LocalRoom()
+    socket_path = os.path.join(tempfile.mkdtemp(), "spark.sock")
+    control = RemoteControl(handlers, room=room, socket_path=socket_path, operators={"operator"})
+    await control.start()
+
+    # Room data channel: command in, effect observed on the loop
+    room_latencies = []
+    for index in range(rounds):
+        paused = index % 2 == 0
+        sent = time.perf_counter()
+        room.send_data(b"pause" if paused else b"resume", CONTROL_TOPIC)
+        while state["paused"] != paused:
+            await asyncio.sleep(0)
+        room_latencies.append(state["changed_at"] - sent)
+    assert any(topic == STATUS_TOPIC for topic, _ in room.local_participant.published)
+
+    room.send_data(b"pause", CONTROL_TOPIC, identity="audience")
+    await asyncio.sleep(0.01)
+    assert state["paused"] is False, "non-operators must not control the agent"
+
+    # Unix socket: JSON command in, reply line out
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    socket_latencies = []
+    for index in range(rounds):
+        command = "pause" if index % 2 == 0 else "resume"
+        sent = time.perf_counter()
+        writer.write(json.dumps({"cmd": command, "id": index}).encode() + b"\n")
+        await writer.drain()
+        while True:
+            reply = json.loads(await reader.readline())
+            if reply["type"] == "reply":
+                break
+        socket_latencies.append(state["changed_at"] - sent)
+        assert reply["ok"] and reply["id"] == index
+    # A connected operator console must not hold up shutdown
+    await asyncio.wait_for(control.stop(), timeout=1.0)
+    writer.close()
+
+    # Without configured operators nobody controls the agent over the room
+    unconfigured = RemoteControl(handlers, room=room)
+    await unconfigured.start()
+    room.send_data(b"status", CONTROL_TOPIC)
+    await asyncio.sleep(0.01)
+    assert unconfigured.commands_handled == 0, "room commands need configured operators"
+    await unconfigured.stop()
+
+    for name, latencies in (("room data channel", room_latencies), ("unix socket", socket_latencies)):
+        latencies = sorted(1000 * latency for latency in latencies)
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"{name:<18} command-to-effect p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+    print("remote control self-check passed")
+
+
+if __name__ == "__main__":
+    # python remote_control.py          - self-check with a stand-in room
+    # python remote_control.py SOCKET   - interactive operator console for a running agent
+    if len(sys.argv) == 2:
+        async def console(path):
+            reader, writer = await asyncio.open_unix_connection(path)
+
+            async def show():
+                while line := await reader.readline():
+                    print(line.decode().rstrip())
+
+            printer = asyncio.ensure_future(show())
+            loop = asyncio.get_running_loop()
+            while command := (await loop.run_in_executor(None, sys.stdin.readline)).strip():
+                writer.write(command.encode() + b"\n")
+                await writer.drain()
+            printer.cancel()
+            writer.close()
+
+        asyncio.run(console(sys.argv[1]))
+    else:
+        asyncio.run(_self_check())
@@ -0,0 +1,243 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+# Crash-safe session state for SPARK.
+#
+# Every change (pause flag, conversation turn, summary, agenda position) is
+# appended as one JSON line to a per-room log and flushed straight away, so a
+# worker that dies mid-event loses at most the line it was writing. A
+# replacement worker joining the same room replays the log to get back to
+# where the old one stopped. The log is compacted into a single "full" record
+# every so often to keep restores fast. A clean shutdown appends an "end"
+# record, so the next event in the same room starts fresh instead of being
+# treated as a crash recovery.
+
+
+def safe_name(room_name):
+    """Room name usable as a file name"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", room_name) or "default"
+
+
+class SessionState:
+    """The parts of a session a replacement worker needs to carry on"""
+
+    def __init__(self, max_turns=20):
+        self.paused = False
+        self.turns = deque(maxlen=max_turns)
+        self.summary = ""
+        self.agenda_index = 0
+        self.restored = False
+
+    def apply(self, record):
+        kind = record["t"]
+        if kind == "full":
+            self.paused = record["paused"]
+            self.turns.clear()
+            self.turns.extend(tuple(turn) for turn in record["turns"])
+            self.summary = record["summary"]
+            self.agenda_index = record["agenda"]
+        elif kind == "pause":
+            self.paused = record["v"]
+        elif kind == "turn":
+            self.turns.append((record["role"], record["text"]))
+        elif kind == "summary":
+            self.summary = record["v"]
+        elif kind == "agenda":
+            self.agenda_index = record["v"]
+
+    def to_record(self):
+        return {
+            "t": "full",
+            "paused": self.paused,
+            "turns": [list(turn) for turn in self.turns],
+            "summary": self.summary,
+            "agenda": self.agenda_index,
+        }
+
+
+class SessionSnapshotStore:
+    """Append-only, per-room log of session state changes"""
+
+    def __init__(self, directory, room_name, max_turns=20, compact_every=200):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{safe_name(room_name)}.jsonl")
+        self.compact_every = compact_every
+        self.max_turns = max_turns
+        self.state = SessionState(max_turns=max_turns)
+        self.records_written = 0
+        self.write_seconds = 0.0
+        self._records_since_compact = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def restore(self):
+        """Replay the log left by a previous worker, returns the restored SessionState"""
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            lines = []
+
+        good_bytes = 0
+        for line in lines:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("unterminated line")
+                record = json.loads(line)
+                self.state.apply(record)
+            except (ValueError, KeyError, TypeError):
+                # A torn last line from a crash mid-write; everything before it is intact
+                break
+            good_bytes += len(line)
+            self.state.restored = True
+            self._records_since_compact += 1
+            if record["t"] == "end":
+                # The previous event shut down cleanly: nothing to carry over
+                self.state = SessionState(max_turns=self.max_turns)
+                self._records_since_compact = 0
+                good_bytes = 0
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        # Drop the torn fragment (or the finished event), so new records are
+        # not glued onto it and lost on the next restore
+        self._file.truncate(good_bytes)
+        return self.state
+
+    def record_pause(self, paused):
+        self._append({"t": "pause", "v": bool(paused)})
+
+    def record_turn(self, role, text):
+        if text:
+            self._append({"t": "turn", "role": role, "text": text})
+
+    def record_summary(self, summary):
+        self._append({"t": "summary", "v": summary})
+
+    def record_agenda(self, index):
+        self._append({"t": "agenda", "v": int(index)})
+
+    def record_end(self):
+        """Mark a clean shutdown, the next worker in this room starts a new event"""
+        self._append({"t": "end"})
+
+    @property
+    def overhead_per_record_us(self):
+        if not self.records_written:
+            return 0.0
+        return 1e6 * self.write_seconds / self.records_written
+
+    def _append(self, record):
+        started = time.perf_counter()
+        with self._lock:
+            if self._file is None:
+                self.restore()
+            self.state.apply(record)
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            # flush() hands the line to the OS, which is enough to survive the
+            # worker process dying; only a host crash needs fsync.
+            self._file.flush()
+            self._records_since_compact += 1
+            if self._records_since_compact >= self.compact_every and record["t"] != "end":
+                self._compact()
+        self.records_written += 1
+        self.write_seconds += time.perf_counter() - started
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.state.to_record(), separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._records_since_compact = 1
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def _crash_worker(directory, turns):
+    """Child process: record a session, then die without any cleanup"""
+    store = SessionSnapshotStore(directory, "bench-room")
+    store.restore()
+    for index in range(turns):
+        store.record_turn("user" if index % 2 == 0 else "assistant", f"turn {index} " + "x" * 120)
+        if index == turns // 2:
+            store.record_pause(True)
+    store.record_agenda(3)
+    print(f"{store.overhead_per_record_us:.1f}", flush=True)
+    os._exit(1)
+
+
+def benchmark(turns=500):
+    with tempfile.TemporaryDirectory() as directory:
+        child = subprocess.run(
+            [sys.executable, __file__, "--crash-worker", directory, str(turns)],
+            capture_output=True, text=True,
+        )
+        crashed_at = time.perf_counter()
+        store = SessionSnapshotStore(directory, "bench-room")
+        state = store.restore()
+        restored_at = time.perf_counter()
+        store.close()
+
+        print(f"turns recorded before crash: {turns}")
+        print(f"snapshot overhead per turn:  {float(child.stdout.strip()):.1f} us")
+        print(f"log size after compaction:   {os.path.getsize(store.path)} bytes")
+        print(f"restore time after crash:    {1000 * (restored_at - crashed_at):.2f} ms")
+        print(f"restored: paused={state.paused} turns={len(state.turns)} agenda={state.agenda_index}")
+
+
+def _self_check():
+    with tempfile.TemporaryDirectory() as directory:
+        # Worker 1 dies mid-write, leaving a torn last line
+        store = SessionSnapshotStore(directory, "check-room")
+        store.restore()
+        store.record_turn("user", "first question")
+        store.record_pause(True)
+        store.close()
+        with open(store.path, "a", encoding="utf-8") as f:
+            f.write('{"t":"turn","role":"assis')
+
+        # Worker 2 resumes and carries on; worker 3 must see what worker 2 wrote
+        store = SessionSnapshotStore(directory, "check-room")
+        assert store.restore().paused
+        store.record_turn("assistant", "second answer")
+        store.close()
+        state = SessionSnapshotStore(directory, "check-room").restore()
+        assert state.paused and list(state.turns) == [
+            ("user", "first question"), ("assistant", "second answer")
+        ], "records written after a torn line were lost"
+
+        # A clean shutdown ends the event: the next one starts fresh
+        store = SessionSnapshotStore(directory, "check-room")
+        store.restore()
+        store.record_end()
+        store.close()
+        store = SessionSnapshotStore(directory, "check-room")
+        state = store.restore()
+        assert not state.restored and not state.paused and not state.turns
+        store.record_turn("user", "new event")
+        store.close()
+        assert list(SessionSnapshotStore(directory, "check-room").restore().turns) == [("user", "new event")]
+    print("session store self-check passed")
+
+
+if __name__ == "__main__":
+    # python session_store.py  - torn-line/clean-end checks, then crash a recording worker and time the restore
+    if len(sys.argv) == 4 and sys.argv[1] == "--crash-worker":
+        _crash_worker(sys.argv[2], int(sys.argv[3]))
+    else:
+        _self_check()
+        benchmark()
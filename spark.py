@@ -0,0 +1,364 @@
+import asyncio
+import importlib
+import os
+import subprocess
+import sys
+from livekit import agents
+from livekit.agents import AgentSession, Agent, ChatContext, RoomInputOptions
+from livekit.plugins import google
+from dotenv import load_dotenv
+from session_store import SessionSnapshotStore
+
+load_dotenv()
+
+# One launcher for every way of running SPARK.
+#
+# The control front-ends (how the host pauses, resumes and stops the agent) and
+# the optional audio/reply pipeline stages are plug-ins. They are registered
+# here by "module:attribute" and only imported when selected, so a text-only
+# run does not import termios, the keyboard hook or the DSP modules. That is
+# worth about 10 ms: livekit.agents and the Google plugin (which bring numpy
+# along) take about 2 s and 165 MB in every mode, see --startup-report.
+#
+#   python spark.py dev --mode raw_tty,remote --stages echo_cancellation,playout_buffer
+#   python spark.py --startup-report
+#
+# --mode/--stages are also read from SPARK_MODE/SPARK_STAGES, which is how the
+# selection reaches the LiveKit job processes.
+
+CO_HOST = "Jegan"
+AI_NAME = "SPARK"
+
+AUDIO_SAMPLE_RATE = 24000
+
+# Session state is snapshotted here so a replacement worker can pick up the event
+SNAPSHOT_DIR = ".spark_sessions"
+
+CONTROL_PLUGINS = {
+    "raw_tty": "controls.raw_tty:RawTtyControl",
+    "text": "controls.text_input:TextInputControl",
+    "keyboard": "controls.keyboard_hook:KeyboardHookControl",
+    "remote": "controls.remote:RemoteFrontEnd",
+}
+
+# Installed in the order given, each stage wraps the session's audio as it
+# stands, so list the playout buffer after echo cancellation to keep it outermost
+# and the interruption filter after it to score echo-cancelled audio.
+STAGE_PLUGINS = {
+    "echo_cancellation": "stages.echo:EchoCancellationStage",
+    "playout_buffer": "stages.playout:PlayoutBufferStage",
+    "interruption_filter": "stages.barge_in:InterruptionFilterStage",
+    "telemetry": "stages.status_telemetry:TelemetryStage",
+    "speculation": "stages.speculative:SpeculationStage",
+}
+
+DEFAULT_MODE = "raw_tty,remote"
+DEFAULT_STAGES = "echo_cancellation,interruption_filter,playout_buffer,telemetry"
+
+
+def load_plugin(registry, name):
+    """Import a registered plug-in on first use and return its class"""
+    if name not in registry:
+        raise ValueError(f"unknown plug-in '{name}', choose from: {', '.join(registry)}")
+    module_name, _, attr = registry[name].partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def selected(env_var, default):
+    return [name.strip() for name in os.environ.get(env_var, default).split(",") if name.strip()]
+
+
+class SparkApp:
+    """Agent state shared by the session, control front-ends and pipeline stages"""
+
+    def __init__(self, ctx, store, state):
+        self.ctx = ctx
+        self.room = ctx.room
+        self.room_name = ctx.job.room.name
+        self.store = store
+        self.sample_rate = AUDIO_SAMPLE_RATE
+        self.loop = asyncio.get_running_loop()
+        self.paused = state.paused
+        self.running = True
+        self.session = None
+        self.agent = None
+        # AgentSession arguments, None for the realtime model; a stage may
+        # choose another pipeline before the session is built
+        self.session_kwargs = None
+        # async callable(user_text) -> async generator of reply text chunks or
+        # None, tried before the LLM
+        self.reply_hooks = []
+        # callable(status), called on the event loop after every state change
+        self.state_listeners = []
+
+    def status(self):
+        """Current state as reported to operators"""
+        return {"paused": self.paused, "running": self.running}
+
+    def call_soon(self, callback, *args):
+        """Run a state change on the session's event loop, for front-ends on their own thread"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def set_paused(self, paused, source="keyboard"):
+        """Pause or resume listening, must run on the session's event loop"""
+        if paused == self.paused:
+            return self.status()
+        self.paused = paused
+        if self.session:
+            self.session.input.set_audio_enabled(not paused)
+        self.store.record_pause(paused)
+        status = "PAUSED" if paused else "RESUMED"
+        print(f"\n🎙️ [{status}] Agent listening is now {status.lower()} ({source})")
+        self._notify()
+        return self.status()
+
+    def toggle_pause(self, source="keyboard"):
+        return self.set_paused(not self.paused, source)
+
+    def stop(self, source="keyboard"):
+        """Ask the main loop to shut the agent down"""
+        self.running = False
+        print(f"\n🛑 Shutdown requested ({source})")
+        self._notify()
+        return self.status()
+
+    def announce(self, text):
+        """Have SPARK read out an operator announcement"""
+        if not text:
+            raise ValueError("announce needs the text to say")
+        self.session.say(text, allow_interruptions=False)
+        return {"announced": text}
+
+    def _notify(self):
+        status = self.status()
+        for listener in list(self.state_listeners):
+            listener(status)
+
+
+class SparkAssistant(Agent):
+    def __init__(self, app, state=None) -> None:
+        instructions = f"""
+Role: You are {AI_NAME}, the AI Co-Host for today's "AI Day" event at Renault Nissan Tech.
+You will collaborate with the human host {CO_HOST} to ensure the event runs smoothly and professionally.
+
+IMPORTANT: You have pause/resume capability controlled by the host. When paused, you should not
+respond to any audio input until resumed. Only respond when the system is in an active listening state.
+"""
+        chat_ctx = ChatContext.empty()
+        if state and state.restored:
+            # Carry on from where the previous worker stopped
+            instructions += f"""
+You are resuming mid-event after a technical interruption. Do not greet the audience again.
+"""
+            if state.agenda_index:
+                instructions += f"We are at agenda item {state.agenda_index + 1}.\n"
+            if state.summary:
+                instructions += f"Summary of the event so far: {state.summary}\n"
+            for role, text in state.turns:
+                chat_ctx.add_message(role=role, content=text)
+        super().__init__(instructions=instructions, chat_ctx=chat_ctx)
+        self.app = app
+
+    async def on_message(self, message):
+        """Override message handling to respect pause state"""
+        if self.app.paused:
+            print(f"[PAUSED] Ignoring message while paused")
+            return
+
+        # Process message normally when not paused
+        await super().on_message(message)
+
+    async def llm_node(self, chat_ctx, tools, model_settings):
+        """Let the reply hooks answer first, e.g. with a speculative reply"""
+        if self.app.reply_hooks:
+            user_text = next(
+                (item.text_content for item in reversed(chat_ctx.items)
+                 if getattr(item, "role", None) == "user"),
+                None,
+            )
+            for hook in self.app.reply_hooks if user_text else ():
+                reply = await hook(user_text)
+                if reply is not None:
+                    try:
+                        async for chunk in reply:
+                            yield chunk
+                    finally:
+                        # Interrupted: stop generating the rest of the reply
+                        await reply.aclose()
+                    return
+        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+            yield chunk
+
+
+async def entrypoint(ctx: agents.JobContext):
+    # Restore state left behind by a worker that died in this room
+    store = SessionSnapshotStore(SNAPSHOT_DIR, ctx.job.room.name)
+    state = store.restore()
+    app = SparkApp(ctx, store, state)
+    if state.restored:
+        status = "PAUSED" if app.paused else "LISTENING"
+        print(f"♻️ Restored session: {status}, {len(state.turns)} recent turns")
+
+    controls = [load_plugin(CONTROL_PLUGINS, name)() for name in selected("SPARK_MODE", DEFAULT_MODE)]
+    stages = [load_plugin(STAGE_PLUGINS, name)() for name in selected("SPARK_STAGES", DEFAULT_STAGES)]
+    print(f"🎤 Starting {AI_NAME}: controls {[type(c).__name__ for c in controls]}, "
+          f"stages {[type(s).__name__ for s in stages]}")
+
+    for stage in stages:
+        stage.prepare(app)
+    if app.session_kwargs is None:
+        app.session_kwargs = dict(
+            llm=google.beta.realtime.RealtimeModel(
+                model="gemini-2.0-flash-exp",
+                voice="kore",
+                modalities=["AUDIO"]
+            ),
+            tts=google.TTS(
+                speaking_rate=0.80,
+            ),
+            min_consecutive_speech_delay=2,
+        )
+    session = AgentSession(**app.session_kwargs)
+    app.agent = SparkAssistant(app, state)
+
+    await session.start(
+        room=ctx.room,
+        agent=app.agent,
+        room_input_options=RoomInputOptions(audio_sample_rate=AUDIO_SAMPLE_RATE),
+    )
+    app.session = session
+    if app.paused:
+        session.input.set_audio_enabled(False)
+
+    @session.on("conversation_item_added")
+    def _on_conversation_item_added(ev):
+        if getattr(ev.item, "role", None) in ("user", "assistant"):
+            store.record_turn(ev.item.role, ev.item.text_content)
+
+    for stage in stages:
+        stage.install(app)
+    for control in controls:
+        await control.start(app)
+
+    await ctx.connect()
+
+    # Quit, shutdown and Ctrl+C end the event; anything else is left for a
+    # replacement worker to recover
+    ended = False
+    try:
+        while app.running:
+            await asyncio.sleep(0.1 if not app.paused else 0.2)
+        ended = True
+    except asyncio.CancelledError:
+        ended = True
+        print("Agent session cancelled.")
+    except KeyboardInterrupt:
+        ended = True
+        print("\n🛑 Received interrupt signal. Shutting down...")
+    finally:
+        app.running = False
+        for control in reversed(controls):
+            await control.stop()
+        for stage in reversed(stages):
+            stage.close()
+        if ended:
+            store.record_end()
+        store.close()
+        print("✅ Voice agent stopped.")
+
+
+def _take_option(argv, name):
+    """Remove --name VALUE / --name=VALUE from argv, returns VALUE or None"""
+    for index, arg in enumerate(argv):
+        if arg == name and index + 1 < len(argv):
+            value = argv[index + 1]
+            del argv[index:index + 2]
+            return value
+        if arg.startswith(name + "="):
+            del argv[index]
+            return arg.partition("=")[2]
+    return None
+
+
+# Run in a fresh interpreter so nothing is imported before the clock starts
+_MEASURE_STARTUP = """
+import resource, sys, time
+started = time.perf_counter()
+import spark
+core = time.perf_counter() - started
+for name in filter(None, sys.argv[1].split(",")):
+    spark.load_plugin(spark.CONTROL_PLUGINS, name)
+for name in filter(None, sys.argv[2].split(",")):
+    spark.load_plugin(spark.STAGE_PLUGINS, name)
+total = time.perf_counter() - started
+# ru_maxrss is kilobytes on Linux, bytes on macOS
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(core, total, rss / 1048576 if sys.platform == "darwin" else rss / 1024)
+"""
+
+
+def startup_report(runs=3):
+    """Startup time and memory per mode, each measured in a fresh interpreter"""
+    everything = (",".join(CONTROL_PLUGINS), ",".join(STAGE_PLUGINS))
+    rows = [
+        ("raw_tty", "raw_tty", ""),
+        ("text", "text", ""),
+        ("keyboard", "keyboard", ""),
+        ("remote", "remote", ""),
+        ("default", DEFAULT_MODE, DEFAULT_STAGES),
+        ("speculation", "text", "speculation"),
+        ("eager (all)", *everything),
+    ]
+    print(f"{'mode':<13} {'core import':>12} {'plug-ins':>10} {'total':>9} {'peak RSS':>10}")
+    for label, mode, stages in rows:
+        samples = []
+        for _ in range(runs):
+            child = subprocess.run(
+                [sys.executable, "-c", _MEASURE_STARTUP, mode, stages],
+                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            if child.returncode != 0:
+                print(f"{label:<13} failed: {child.stderr.strip().splitlines()[-1]}")
+                break
+            samples.append([float(value) for value in child.stdout.split()[-3:]])
+        else:
+            # Best of several runs, the first one also pays for a cold page cache
+            core, total, rss = min(samples, key=lambda sample: sample[1])
+            print(f"{label:<13} {1000 * core:>9.0f} ms {1000 * (total - core):>7.0f} ms"
+                  f" {1000 * total:>6.0f} ms {rss:>7.1f} MB")
+
+
+def main(mode=None, stages=None):
+    """Run the LiveKit worker CLI, optionally with a fixed mode for the legacy scripts"""
+    argv = sys.argv[1:]
+    mode = _take_option(argv, "--mode") or mode
+    stages_option = _take_option(argv, "--stages")
+    if stages_option is not None:
+        stages = stages_option
+    sys.argv[1:] = argv
+    if mode is not None:
+        os.environ["SPARK_MODE"] = mode
+    if stages is not None:
+        os.environ["SPARK_STAGES"] = stages
+    # Fail on a typo here rather than in every job process
+    for registry, env_var, default in ((CONTROL_PLUGINS, "SPARK_MODE", DEFAULT_MODE),
+                                       (STAGE_PLUGINS, "SPARK_STAGES", DEFAULT_STAGES)):
+        unknown = [name for name in selected(env_var, default) if name not in registry]
+        if unknown:
+            sys.exit(f"Unknown plug-in(s) {unknown}, choose from: {', '.join(registry)}")
+
+    print("🚀 Starting Voice Agent CLI")
+    try:
+        agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    except KeyboardInterrupt:
+        print("\n❌ Application terminated by user.")
+    except Exception as e:
+        print(f"💥 Application error: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    if "--startup-report" in sys.argv:
+        startup_report()
+    else:
+        main()
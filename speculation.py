@@ -0,0 +1,270 @@
+import asyncio
+import difflib
+import re
+import time
+
+# Speculative replies for panel Q&A.
+#
+# While someone is still asking a question, the streaming STT keeps sending
+# partial transcripts. Once a partial stops changing, SPARK starts generating
+# its answer in the background. At end of turn the final transcript is
+# compared with the text the speculation was started from: close enough and
+# the ready (or half-ready) answer is used straight away, otherwise it is
+# thrown away and the normal reply runs as before. The answer is buffered as
+# it streams in, so a committed one is replayed from its first chunk and then
+# continues live instead of waiting for the whole reply.
+
+
+def normalize(text):
+    """Lower-case words only, so punctuation and casing fixes still match"""
+    return " ".join(re.findall(r"[\w']+", text.lower()))
+
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, normalize(a), normalize(b)).ratio()
+
+
+class _Speculation:
+    """One background generation, buffered so it can be replayed from its first chunk"""
+
+    def __init__(self, stream, text):
+        self.text = text
+        self.started = time.perf_counter()
+        self.first_chunk_at = None
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run(stream))
+
+    async def _run(self, stream):
+        try:
+            async for chunk in stream:
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = time.perf_counter()
+                self.chunks.append(chunk)
+                self._changed.set()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._changed.set()
+
+    async def wait_first_chunk(self):
+        while not self.chunks and not self.done:
+            self._changed.clear()
+            await self._changed.wait()
+
+    async def replay(self):
+        """Every chunk so far, then the rest as it is generated"""
+        index = 0
+        try:
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error:
+                        print(f"Speculative reply failed: {self.error}")
+                    return
+                self._changed.clear()
+                await self._changed.wait()
+        finally:
+            # The reply was interrupted: stop generating the rest of it
+            self.task.cancel()
+
+
+class SpeculativeResponder:
+    """Starts a reply on a stable partial transcript and commits or discards it at end of turn"""
+
+    def __init__(self, generate, similarity_threshold=0.9, stable_for=0.3, min_words=3):
+        # generate: callable(user_text) -> async iterator of reply text chunks
+        self.generate = generate
+        self.similarity_threshold = similarity_threshold
+        self.stable_for = stable_for
+        self.min_words = min_words
+
+        self._partial = ""
+        self._stable_timer = None
+        self._spec = None
+
+        self.started = 0
+        self.committed = 0
+        self.wasted = 0
+        self.latency_saved = 0.0
+
+    def on_partial(self, text):
+        """Feed an interim transcript, must be called on the event loop"""
+        if normalize(text) == normalize(self._partial):
+            return
+        self._partial = text
+        if self._spec and similarity(text, self._spec.text) < self.similarity_threshold:
+            # The question moved on, the running speculation can no longer be used
+            self._discard()
+        if self._stable_timer:
+            self._stable_timer.cancel()
+        self._stable_timer = asyncio.get_running_loop().call_later(
+            self.stable_for, self._on_stable, text
+        )
+
+    async def on_final(self, text):
+        """End of turn: the speculative reply as a stream of text chunks if it still fits, else None"""
+        if self._stable_timer:
+            self._stable_timer.cancel()
+            self._stable_timer = None
+        self._partial = ""
+        if self._spec is None:
+            return None
+        if similarity(text, self._spec.text) < self.similarity_threshold:
+            self._discard()
+            return None
+
+        spec, self._spec = self._spec, None
+        final_at = time.perf_counter()
+        try:
+            # Only up to the first chunk: a speculation that fails before
+            # saying anything can still fall back to the normal reply
+            await spec.wait_first_chunk()
+        except asyncio.CancelledError:
+            spec.task.cancel()
+            raise
+        if not spec.chunks:
+            print(f"Speculative reply failed: {spec.error}")
+            self.wasted += 1
+            return None
+        # Time the model had already been working towards its first words when the turn ended
+        self.latency_saved += min(final_at, spec.first_chunk_at) - spec.started
+        self.committed += 1
+        return spec.replay()
+
+    def cancel(self):
+        """Drop any speculation, e.g. when the agent is paused or interrupted"""
+        if self._stable_timer:
+            self._stable_timer.cancel()
+            self._stable_timer = None
+        self._partial = ""
+        self._discard()
+
+    @property
+    def commit_rate(self):
+        return self.committed / self.started if self.started else 0.0
+
+    def _on_stable(self, text):
+        self._stable_timer = None
+        if len(normalize(text).split()) < self.min_words:
+            return
+        if self._spec and similarity(text, self._spec.text) >= self.similarity_threshold:
+            return
+        self._discard()
+        self.started += 1
+        self._spec = _Speculation(self.generate(text), text)
+
+    def _discard(self):
+        if self._spec:
+            self._spec.task.cancel()
+            self._spec = None
+            self.wasted += 1
+
+
+class FakeModel:
+    """Stand-in streaming LLM: first chunk after `delay` seconds, then a word every `chunk_gap`"""
+
+    def __init__(self, delay, chunk_gap=0.05):
+        self.delay = delay
+        self.chunk_gap = chunk_gap
+        self.calls = 0
+        self.chunks = 0
+
+    async def generate(self, text):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        for index, word in enumerate(f"Answer to: {normalize(text)}".split(" ")):
+            if index:
+                await asyncio.sleep(self.chunk_gap)
+            self.chunks += 1
+            yield word if index == 0 else " " + word
+
+    def duration(self, text):
+        """Time the full reply to text takes to generate"""
+        return self.delay + self.chunk_gap * len(normalize(text).split()) + self.chunk_gap
+
+
+async def _replay(responder, model, partials, final, gap, endpoint_delay=0.5):
+    """Feed partial transcripts gap seconds apart, then time the reply after end of turn
+
+    Returns the reply, the time to its first chunk and the time to all of it.
+    """
+    for partial in partials:
+        responder.on_partial(partial)
+        await asyncio.sleep(gap)
+    # Silence the turn detector waits for before declaring end of turn
+    await asyncio.sleep(endpoint_delay)
+    ended = time.perf_counter()
+    stream = await responder.on_final(final)
+    if stream is None:
+        stream = model.generate(final)
+    parts, first_chunk = [], None
+    async for chunk in stream:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - ended
+        parts.append(chunk)
+    return "".join(parts), first_chunk, time.perf_counter() - ended
+
+
+async def _self_check():
+    question = "SPARK what are the main takeaways from the autonomous driving panel"
+    words = question.split()
+    growing = [" ".join(words[:n]) for n in range(1, len(words) + 1)]
+    scenarios = [
+        # name, partials, final transcript, model delay
+        ("stable question", growing + [question], question + "?", 0.6),
+        ("slow model", growing + [question], question + "?", 1.5),
+        ("question revised", growing + [question],
+         "SPARK actually tell us when the lunch break starts", 0.6),
+        ("short answer", ["yes"] * 4, "yes", 0.6),
+    ]
+
+    # First chunk: when SPARK can start speaking. Full reply: when the last text is ready.
+    print(f"{'scenario':<18} {'first chunk':>12} {'baseline':>9} {'full reply':>11} {'baseline':>9}  outcome")
+    for name, partials, final, delay in scenarios:
+        model = FakeModel(delay)
+        responder = SpeculativeResponder(model.generate)
+        reply, first_chunk, latency = await _replay(responder, model, partials, final, gap=0.1)
+        assert reply == f"Answer to: {normalize(final)}" or responder.committed
+        outcome = "committed" if responder.committed else ("wasted" if responder.wasted else "not started")
+        print(f"{name:<18} {1000 * first_chunk:>9.0f} ms {1000 * delay:>6.0f} ms"
+              f" {1000 * latency:>8.0f} ms {1000 * model.duration(final):>6.0f} ms  {outcome}"
+              f" (saved {1000 * responder.latency_saved:.0f} ms)")
+
+    # A revised question must never get the stale answer
+    model = FakeModel(0.2)
+    responder = SpeculativeResponder(model.generate)
+    reply, _, _ = await _replay(responder, model, growing + [question], "what time is lunch", 0.1)
+    assert reply == "Answer to: what time is lunch" and responder.wasted == 1
+
+    # A speculation still generating streams its first words before it finishes
+    model = FakeModel(0.1, chunk_gap=0.2)
+    responder = SpeculativeResponder(model.generate)
+    reply, first_chunk, latency = await _replay(responder, model, growing + [question], question, 0.1)
+    assert responder.committed and reply == f"Answer to: {normalize(question)}"
+    assert first_chunk < 0.05 < latency, "a committed speculation must stream, not wait for the full reply"
+
+    # Interrupting a committed reply stops the rest of the generation
+    model = FakeModel(0.1, chunk_gap=0.2)
+    responder = SpeculativeResponder(model.generate)
+    for partial in growing:
+        responder.on_partial(partial)
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(0.5)
+    stream = await responder.on_final(question)
+    await stream.__anext__()
+    await stream.aclose()
+    generated = model.chunks
+    await asyncio.sleep(0.5)
+    assert model.chunks == generated, "an interrupted reply must stop generating"
+    print("speculation self-check passed")
+
+
+if __name__ == "__main__":
+    # python speculation.py  - replay partial transcripts against a fake model
+    asyncio.run(_self_check())
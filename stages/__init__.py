@@ -0,0 +1,15 @@
+# Optional pipeline stages for spark.py, see STAGE_PLUGINS there.
+# Keep this module free of heavy imports: it is loaded for every stage.
+
+
+class PipelineStage:
+    """Base for stages: hooks are called in order, on the session's event loop"""
+
+    def prepare(self, app):
+        """Before the AgentSession is built, e.g. to pick another pipeline"""
+
+    def install(self, app):
+        """After session.start, e.g. to wrap session.input.audio / session.output.audio"""
+
+    def close(self):
+        """At shutdown, release resources and print stats"""
@@ -0,0 +1,108 @@
+from collections import deque
+import numpy as np
+from livekit import rtc
+from livekit.agents.voice import io
+from interruption import CANDIDATE, INTERRUPT, InterruptionClassifier
+from stages import PipelineStage
+
+# Longest stretch of undecided overlap held back from the session; the start
+# of a real interruption is released to the model once it is recognised
+MAX_HOLD_SECONDS = 1.5
+
+
+class InterruptionGateInput(io.AudioInput):
+    """Room audio input that only lets overlapping speech through once it is a real interruption"""
+
+    def __init__(self, classifier, source: io.AudioInput, session):
+        super().__init__(label="InterruptionGate", source=source)
+        self.classifier = classifier
+        self.speaking = False
+        self._session = session
+        self._held = deque()
+        self._held_samples = 0
+        self._max_held = int(MAX_HOLD_SECONDS * classifier.sample_rate)
+        self._interrupted = False
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        frame = await self.source.__anext__()
+        if frame.num_channels != 1 or frame.sample_rate != self.classifier.sample_rate:
+            return frame
+        samples = np.frombuffer(frame.data, dtype=np.int16)
+        state = self.classifier.process(samples, speaking=self.speaking)
+
+        if state == CANDIDATE:
+            # Undecided: the session hears silence until the classifier makes up its mind
+            self._hold(samples)
+            return _frame(np.zeros_like(samples), frame.sample_rate)
+
+        if state == INTERRUPT:
+            if self._interrupted:
+                return frame
+            self._interrupted = True
+            try:
+                self._session.interrupt()
+            except RuntimeError as e:
+                # e.g. an announcement that does not allow interruptions
+                print(f"Interruption ignored: {e}")
+            return self._release(samples, frame.sample_rate)
+
+        self._interrupted = False
+        if self._held and not self.speaking:
+            # SPARK stopped talking mid-overlap, so this is simply the user's turn
+            return self._release(samples, frame.sample_rate)
+        # Applause, murmur or a cough: drop what was held
+        self._held.clear()
+        self._held_samples = 0
+        return frame
+
+    def _hold(self, samples):
+        self._held.append(samples)
+        self._held_samples += len(samples)
+        while self._held_samples > self._max_held:
+            self._held_samples -= len(self._held.popleft())
+
+    def _release(self, samples, sample_rate):
+        """Held audio plus the current frame as one frame, so the model hears the start of it"""
+        self._held.append(samples)
+        audio = np.concatenate(self._held)
+        self._held.clear()
+        self._held_samples = 0
+        return _frame(audio, sample_rate)
+
+
+def _frame(samples, sample_rate):
+    return rtc.AudioFrame(
+        data=samples.tobytes(),
+        sample_rate=sample_rate,
+        num_channels=1,
+        samples_per_channel=len(samples),
+    )
+
+
+class InterruptionFilterStage(PipelineStage):
+    """Keep applause and audience noise from cutting SPARK off"""
+
+    def __init__(self):
+        self.gate = None
+
+    def install(self, app):
+        session = app.session
+        if not session.input.audio:
+            return
+        # Install after echo cancellation so SPARK's own voice is not scored as an interruption
+        self.gate = InterruptionGateInput(
+            InterruptionClassifier(sample_rate=app.sample_rate), session.input.audio, session
+        )
+        session.input.audio = self.gate
+
+        @session.on("agent_state_changed")
+        def _on_agent_state_changed(ev):
+            self.gate.speaking = ev.new_state == "speaking"
+
+    def close(self):
+        if self.gate:
+            classifier = self.gate.classifier
+            latencies = sorted(classifier.decision_latencies)
+            median = f"{1000 * latencies[len(latencies) // 2]:.0f} ms" if latencies else "n/a"
+            print(f"🙊 Interruptions: {classifier.interruptions} accepted, {classifier.rejected} rejected "
+                  f"of {classifier.overlaps} overlaps, median decision {median}")
@@ -0,0 +1,108 @@
+import numpy as np
+from livekit import rtc
+from livekit.agents.voice import io
+from dsp_pool import DspPool, FallbackStream, InlineStream
+from echo_canceller import EchoCanceller, resample_linear
+from stages import PipelineStage
+
+# Remove SPARK's own voice from the room audio before it reaches the model
+ECHO_BULK_DELAY = 0.1  # seconds of playout/network delay before the echo path starts
+# Worker processes for audio DSP, 0 runs it on the session's event loop. Each
+# room is its own job process, so this is per room, not shared across rooms.
+# In-loop by default: python dsp_pool.py showed more late frames with offload
+# (a pipe round trip per 10 ms frame) than without it.
+DSP_WORKERS = 0
+
+
+class EchoReferenceOutput(io.AudioOutput):
+    """Audio output that feeds everything SPARK plays to the echo canceller"""
+
+    def __init__(self, dsp, next_in_chain: io.AudioOutput, sample_rate):
+        super().__init__(
+            label="EchoReference",
+            capabilities=io.AudioOutputCapabilities(pause=True),
+            next_in_chain=next_in_chain,
+            sample_rate=next_in_chain.sample_rate,
+        )
+        self._dsp = dsp
+        self._dsp_rate = sample_rate
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        samples = np.frombuffer(frame.data, dtype=np.int16)[::frame.num_channels]
+        self._dsp.push_reference(resample_linear(samples, frame.sample_rate, self._dsp_rate))
+        await self.next_in_chain.capture_frame(frame)
+
+    def flush(self) -> None:
+        super().flush()
+        self.next_in_chain.flush()
+
+    def clear_buffer(self) -> None:
+        # Interrupted: what was queued for playout never reaches the room
+        self._dsp.clear_reference()
+        self.next_in_chain.clear_buffer()
+
+
+class EchoCancelledInput(io.AudioInput):
+    """Room audio input with SPARK's own voice removed"""
+
+    def __init__(self, dsp, source: io.AudioInput, sample_rate):
+        super().__init__(label="EchoCancelled", source=source)
+        self._dsp = dsp
+        self._dsp_rate = sample_rate
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        frame = await self.source.__anext__()
+        if frame.num_channels != 1 or frame.sample_rate != self._dsp_rate:
+            return frame
+        cleaned = await self._dsp.process(np.frombuffer(frame.data, dtype=np.int16))
+        return rtc.AudioFrame(
+            data=cleaned.tobytes(),
+            sample_rate=frame.sample_rate,
+            num_channels=1,
+            samples_per_channel=frame.samples_per_channel,
+        )
+
+
+class EchoCancellationStage(PipelineStage):
+    """Adaptive echo cancellation on the room input, referenced to SPARK's own output"""
+
+    def __init__(self):
+        self.pool = None
+        self.dsp = None
+
+    def install(self, app):
+        session = app.session
+        if not (session.input.audio and session.output.audio):
+            return
+        specs = [(EchoCanceller, {"sample_rate": app.sample_rate, "bulk_delay": ECHO_BULK_DELAY})]
+        if DSP_WORKERS > 0:
+            self.pool = DspPool(specs, workers=DSP_WORKERS, sample_rate=app.sample_rate)
+            self.pool.start()
+            # If the worker dies the room keeps its microphone, cancelled in-loop
+            self.dsp = FallbackStream(self.pool.open_stream(), specs)
+        else:
+            self.dsp = InlineStream(specs)
+        session.output.audio = EchoReferenceOutput(self.dsp, session.output.audio, app.sample_rate)
+        session.input.audio = EchoCancelledInput(self.dsp, session.input.audio, app.sample_rate)
+
+        paused = [app.paused]
+
+        def _on_state(status):
+            if paused[0] and not status["paused"]:
+                # The microphone was detached while paused, so announcements
+                # queued reference it never heard; start matching afresh
+                self.dsp.clear_reference()
+            paused[0] = status["paused"]
+
+        app.state_listeners.append(_on_state)
+        print(f"🔁 Echo cancellation enabled ({DSP_WORKERS} DSP worker(s))")
+
+    def close(self):
+        stream = self.dsp.stream if isinstance(self.dsp, FallbackStream) else self.dsp
+        if isinstance(stream, InlineStream):
+            canceller = stream.stages[0]
+            print(f"🔁 Echo cancellation: {canceller.erle_db:.1f} dB ERLE, "
+                  f"{canceller.cpu_seconds:.1f} s CPU")
+        if self.pool:
+            self.pool.stop()
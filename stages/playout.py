@@ -0,0 +1,104 @@
+import asyncio
+import time
+import numpy as np
+from livekit import rtc
+from livekit.agents.voice import io
+from playout_buffer import PlayoutBuffer
+from stages import PipelineStage
+
+
+class PlayoutBufferOutput(io.AudioOutput):
+    """Audio output that paces SPARK's speech into the room through an adaptive jitter buffer"""
+
+    def __init__(self, next_in_chain: io.AudioOutput):
+        super().__init__(
+            label="PlayoutBuffer",
+            capabilities=io.AudioOutputCapabilities(pause=True),
+            next_in_chain=next_in_chain,
+            sample_rate=next_in_chain.sample_rate,
+        )
+        self.buffer = None
+        self._buffer_rate = None
+        self._flush_pending = False
+        self._forwarded = False  # any frame of the current segment reached next_in_chain
+        self._task = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if frame.num_channels != 1:
+            self._forwarded = True
+            await self.next_in_chain.capture_frame(frame)
+            return
+        if self.buffer is None or frame.sample_rate != self._buffer_rate:
+            self._buffer_rate = frame.sample_rate
+            self.buffer = PlayoutBuffer(sample_rate=frame.sample_rate)
+        self.buffer.push(np.frombuffer(frame.data, dtype=np.int16).copy(), time.monotonic())
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._playout())
+
+    def flush(self) -> None:
+        super().flush()
+        if self.buffer is None or self._task is None or self._task.done():
+            self.next_in_chain.flush()
+            return
+        # Forwarded by the playout task once the buffer has drained
+        self.buffer.end_of_segment()
+        self._flush_pending = True
+
+    def clear_buffer(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.buffer:
+            self.buffer.clear()
+        if self._flush_pending:
+            self._flush_pending = False
+            self.next_in_chain.flush()
+        self.next_in_chain.clear_buffer()
+        if not self._forwarded and self._pending_playback_count:
+            # Interrupted during the initial hold: nothing downstream will report this segment
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        self._forwarded = False
+
+    async def _playout(self):
+        tick = self.buffer.frame_ms / 1000.0
+        next_tick = time.monotonic()
+        while True:
+            samples = self.buffer.pop(time.monotonic())
+            if samples is not None:
+                self._forwarded = True
+                await self.next_in_chain.capture_frame(rtc.AudioFrame(
+                    data=samples.tobytes(),
+                    sample_rate=self._buffer_rate,
+                    num_channels=1,
+                    samples_per_channel=len(samples),
+                ))
+            elif self.buffer.empty and self._flush_pending:
+                self._flush_pending = False
+                self.next_in_chain.flush()
+                if not self._forwarded and self._pending_playback_count:
+                    self.on_playback_finished(playback_position=0.0, interrupted=True)
+                self._forwarded = False
+                return
+            next_tick += tick
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+
+
+class PlayoutBufferStage(PipelineStage):
+    """Smooth out bursty model audio before it reaches the room track"""
+
+    def __init__(self):
+        self.output = None
+
+    def install(self, app):
+        if app.session.output.audio:
+            # Install after echo cancellation so it is outermost and the echo
+            # canceller sees audio at the pace it is played
+            self.output = PlayoutBufferOutput(app.session.output.audio)
+            app.session.output.audio = self.output
+
+    def close(self):
+        if self.output and self.output.buffer:
+            buffer = self.output.buffer
+            print(f"🔈 Playout: {buffer.underruns} underruns, {buffer.late_frames} late frames, "
+                  f"target {buffer.target_depth_ms:.0f} ms, max depth {buffer.max_depth_seen_ms:.0f} ms")
@@ -0,0 +1,59 @@
+from livekit.plugins import google
+from speculation import SpeculativeResponder
+from stages import PipelineStage
+
+# Start answering on a stable partial transcript. Needs interim transcripts,
+# so this runs the STT -> LLM -> TTS pipeline instead of the realtime model.
+SPECULATION_SIMILARITY = 0.9
+
+
+class SpeculationStage(PipelineStage):
+    """Speculative replies on stable partial transcripts"""
+
+    def __init__(self):
+        self.speculator = None
+
+    def prepare(self, app):
+        app.session_kwargs = dict(
+            stt=google.STT(interim_results=True),
+            llm=google.LLM(model="gemini-2.0-flash"),
+            tts=google.TTS(
+                speaking_rate=0.80,
+            ),
+            min_consecutive_speech_delay=2,
+            # The session's own preemptive replies would call llm_node on an
+            # early STT final and use up the speculation before the turn ends
+            preemptive_generation=False,
+        )
+
+    def install(self, app):
+        self.speculator = SpeculativeResponder(
+            lambda text: self._reply(app, text),
+            similarity_threshold=SPECULATION_SIMILARITY,
+        )
+        app.reply_hooks.append(self.speculator.on_final)
+
+        @app.session.on("user_input_transcribed")
+        def _on_user_input_transcribed(ev):
+            if not ev.is_final and not app.paused:
+                self.speculator.on_partial(ev.transcript)
+
+        def _on_state(status):
+            if status["paused"]:
+                self.speculator.cancel()
+
+        app.state_listeners.append(_on_state)
+
+    async def _reply(self, app, text):
+        """Stream SPARK's answer to a partial question from the session's text LLM"""
+        chat_ctx = app.agent.chat_ctx.copy()
+        chat_ctx.add_message(role="user", content=text)
+        async with app.session.llm.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    yield chunk.delta.content
+
+    def close(self):
+        if self.speculator:
+            print(f"⚡ Speculation: {self.speculator.committed} committed, {self.speculator.wasted} wasted, "
+                  f"{self.speculator.latency_saved:.1f} s saved")
@@ -0,0 +1,56 @@
+import time
+from stages import PipelineStage
+from telemetry import TelemetryPublisher
+
+# Seconds between batched status snapshots; pause/resume is always sent at once
+TELEMETRY_INTERVAL = 0.5
+
+
+class TelemetryStage(PipelineStage):
+    """Live paused/speaking/queue/latency status for the room UI"""
+
+    def __init__(self):
+        self.publisher = None
+        self._queued = set()
+        self._turn_ended = None
+
+    def install(self, app):
+        session = app.session
+        publisher = self.publisher = TelemetryPublisher(app.room, interval=TELEMETRY_INTERVAL)
+        publisher.update(paused=app.paused)
+        app.state_listeners.append(
+            lambda status: publisher.update(paused=status["paused"], running=status["running"])
+        )
+
+        @session.on("agent_state_changed")
+        def _on_agent_state_changed(ev):
+            speaking = ev.new_state == "speaking"
+            if speaking and self._turn_ended is not None:
+                # End of the user's turn to the first audio of the reply
+                publisher.update(latency_ms=1000 * (time.monotonic() - self._turn_ended))
+                self._turn_ended = None
+            publisher.update(speaking=speaking)
+
+        @session.on("user_state_changed")
+        def _on_user_state_changed(ev):
+            if ev.old_state == "speaking" and ev.new_state == "listening":
+                self._turn_ended = time.monotonic()
+
+        @session.on("speech_created")
+        def _on_speech_created(ev):
+            self._queued.add(ev.speech_handle)
+            ev.speech_handle.add_done_callback(self._on_speech_done)
+            publisher.update(queue=len(self._queued))
+
+        publisher.start()
+
+    def _on_speech_done(self, handle):
+        self._queued.discard(handle)
+        self.publisher.update(queue=len(self._queued))
+
+    def close(self):
+        if self.publisher:
+            self.publisher.stop()
+            coalescer = self.publisher.coalescer
+            print(f"📡 Telemetry: {coalescer.updates} updates sent as {coalescer.messages} messages, "
+                  f"{coalescer.bytes_sent} bytes")
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import struct
+import sys
+import time
+
+# Live status telemetry for the room UI.
+#
+# SPARK's state (paused, speaking, speech queue depth, last turn latency) can
+# change dozens of times a second in a busy session. Instead of publishing
+# every change, updates are merged into one pending snapshot that is sent at
+# most every `interval` seconds, and only if something changed. Pause, resume
+# and shutdown are the exception: the operator needs to see those straight
+# away, so they flush the snapshot immediately. An unchanged state is re-sent
+# every keyframe_interval seconds so late joiners and lost batches catch up.
+#
+# Snapshots are 7 bytes (see encode_status); decode_status turns one back into
+# a dict. Nothing is published while the room is not connected; the latest
+# state is sent once it is.
+
+TELEMETRY_TOPIC = "spark.telemetry"
+VERSION = 1
+
+# version, flags, sequence number, queue depth, last turn latency (ms)
+_FORMAT = struct.Struct("<BBHBH")
+_PAUSED, _SPEAKING, _RUNNING = 1, 2, 4
+
+
+def encode_status(status, seq):
+    flags = ((_PAUSED if status.get("paused") else 0)
+             | (_SPEAKING if status.get("speaking") else 0)
+             | (_RUNNING if status.get("running", True) else 0))
+    return _FORMAT.pack(
+        VERSION, flags, seq & 0xFFFF,
+        min(int(status.get("queue", 0)), 0xFF),
+        min(int(round(status.get("latency_ms", 0))), 0xFFFF),
+    )
+
+
+def decode_status(payload):
+    version, flags, seq, queue, latency_ms = _FORMAT.unpack(payload)
+    if version != VERSION:
+        raise ValueError(f"unsupported telemetry version {version}")
+    return {
+        "seq": seq,
+        "paused": bool(flags & _PAUSED),
+        "speaking": bool(flags & _SPEAKING),
+        "running": bool(flags & _RUNNING),
+        "queue": queue,
+        "latency_ms": latency_ms,
+    }
+
+
+class StatusCoalescer:
+    """Merges status updates into batched snapshots, driven by an external clock"""
+
+    def __init__(self, interval=0.5, immediate=("paused", "running"), keyframe_interval=5.0):
+        self.interval = interval
+        self.immediate = immediate
+        self.keyframe_interval = keyframe_interval
+        self.state = {"paused": False, "speaking": False, "running": True, "queue": 0, "latency_ms": 0}
+        self._dirty = False
+        self._last_sent = None
+        self._seq = 0
+
+        self.updates = 0
+        self.messages = 0
+        self.bytes_sent = 0
+
+    def update(self, now, **fields):
+        """Merge changed fields; returns a snapshot to send right away, else None"""
+        self.updates += 1
+        urgent = False
+        for key, value in fields.items():
+            if self.state.get(key) != value:
+                self.state[key] = value
+                self._dirty = True
+                urgent = urgent or key in self.immediate
+        return self._snapshot(now) if urgent else None
+
+    def poll(self, now):
+        """The batched snapshot, if one is due at time now (seconds)"""
+        if self._last_sent is None:
+            return self._snapshot(now)
+        elapsed = now - self._last_sent
+        if (self._dirty and elapsed >= self.interval) or elapsed >= self.keyframe_interval:
+            return self._snapshot(now)
+        return None
+
+    def requeue(self, payload):
+        """A snapshot that could not be sent: the current state goes out at the next poll"""
+        self._dirty = True
+        self.messages -= 1
+        self.bytes_sent -= len(payload)
+
+    def _snapshot(self, now):
+        self._seq += 1
+        self._dirty = False
+        self._last_sent = now
+        payload = encode_status(self.state, self._seq)
+        self.messages += 1
+        self.bytes_sent += len(payload)
+        return payload
+
+
+class TelemetryPublisher:
+    """Publishes coalesced status snapshots to the room on TELEMETRY_TOPIC"""
+
+    def __init__(self, room, interval=0.5, keyframe_interval=5.0):
+        self.room = room
+        self.coalescer = StatusCoalescer(interval=interval, keyframe_interval=keyframe_interval)
+        self._task = None
+        self._tasks = set()
+        self._resend_reliably = False
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def update(self, **fields):
+        """Record a state change, must be called on the event loop"""
+        payload = self.coalescer.update(time.monotonic(), **fields)
+        if payload:
+            # Pause/resume: sent now, and reliably, so the UI never misses one
+            task = asyncio.ensure_future(self._publish(payload, reliable=True))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self):
+        tick = min(self.coalescer.interval, self.coalescer.keyframe_interval) / 4
+        while True:
+            payload = self.coalescer.poll(time.monotonic())
+            if payload:
+                # A lost batch is superseded by the next one, unless it carries
+                # a pause/resume that could not be sent earlier
+                reliable, self._resend_reliably = self._resend_reliably, False
+                await self._publish(payload, reliable=reliable)
+            await asyncio.sleep(tick)
+
+    async def _publish(self, payload, reliable):
+        if not self.room.isconnected():
+            # Before connect, or while reconnecting: local_participant is not usable yet
+            self.coalescer.requeue(payload)
+            self._resend_reliably = self._resend_reliably or reliable
+            return
+        try:
+            await self.room.local_participant.publish_data(payload, reliable=reliable, topic=TELEMETRY_TOPIC)
+        except Exception as e:
+            print(f"Telemetry publish error: {e}")
+
+
+def synthetic_churn(seconds=60.0, seed=5):
+    """(time, fields) updates from a busy session: fast turn-taking, queued speech, pause toggles"""
+    # Only the benchmark needs numpy, keep it out of the agent's import
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    events = []
+    now, speaking, queue, paused = 0.0, False, 0, False
+    next_pause = rng.uniform(3, 8)
+    while now < seconds:
+        now += rng.exponential(0.01)
+        roll = rng.random()
+        if now >= next_pause:
+            paused = not paused
+            next_pause = now + rng.uniform(3, 8)
+            events.append((now, {"paused": paused}))
+        elif roll < 0.3:
+            speaking = not speaking
+            events.append((now, {"speaking": speaking}))
+        elif roll < 0.8:
+            queue = max(0, queue + int(rng.choice([-1, 1])))
+            events.append((now, {"queue": queue}))
+        else:
+            events.append((now, {"latency_ms": int(rng.uniform(300, 1500))}))
+    return events
+
+
+def benchmark(events, seconds, tick=0.01):
+    print(f"synthetic session: {seconds:.0f} s, {len(events)} state changes "
+          f"({len(events) / seconds:.0f}/s)")
+    print(f"{'publisher':<24} {'msgs/s':>8} {'bytes/s':>9} {'max staleness':>14} {'pauses sent at once':>20}")
+
+    # Every change as its own JSON state message, the way operator replies are sent
+    state = {"paused": False, "speaking": False, "running": True, "queue": 0, "latency_ms": 0}
+    sent = 0
+    toggles = sum('paused' in fields for _, fields in events)
+    for _, fields in events:
+        state.update(fields)
+        sent += len(json.dumps({"type": "state", **state}).encode())
+    print(f"{'every change, JSON':<24} {len(events) / seconds:>8.1f} {sent / seconds:>9.0f}"
+          f" {0:>11.0f} ms {toggles:>14}/{toggles}")
+
+    for interval in (0.1, 0.25, 0.5, 1.0):
+        coalescer = StatusCoalescer(interval=interval)
+        staleness, immediate = 0.0, 0
+        pending_since = None
+        index, now = 0, 0.0
+        while now < seconds:
+            while index < len(events) and events[index][0] <= now:
+                at, fields = events[index]
+                if coalescer.update(at, **fields) is not None:
+                    immediate += 1
+                    pending_since = None
+                elif coalescer._dirty and pending_since is None:
+                    pending_since = at
+                index += 1
+            if coalescer.poll(now) is not None and pending_since is not None:
+                # How long the UI showed an outdated state
+                staleness = max(staleness, now - pending_since)
+                pending_since = None
+            now += tick
+        print(f"{f'coalesced, {1000 * interval:.0f} ms':<24} {coalescer.messages / seconds:>8.1f}"
+              f" {coalescer.bytes_sent / seconds:>9.0f} {1000 * staleness:>11.0f} ms"
+              f" {immediate:>14}/{toggles}")
+
+
+if __name__ == "__main__":
+    # python telemetry.py [seconds]  - message rate and bytes/s under a synthetic high-churn session
+    seconds = float(sys.argv[1]) if len(sys.argv) == 2 else 60.0
+    benchmark(synthetic_churn(seconds), seconds)